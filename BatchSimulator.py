@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import argparse
+import numpy as np
+from LineEmUp import LineEmUp
+
+
+class BatchSimulator:
+    """
+    Plays thousands of LineEmUp games in lockstep with NumPy, to screen board layouts and heuristics
+    before running full alphabeta tournaments.
+
+    Every player uses a 1-ply greedy policy: it scores each empty cell with its heuristic and plays the best one
+    (ties broken at random). The heuristics are E1/E2/E3-style approximations computed on window counts:
+        E1 - stand-in that plays a uniformly random empty cell. It is not e(): e() counts Black tokens across
+             rows and adds a bonus for every row where that running count equals winning_size, so its value
+             depends on the row of the cell played in a way window counts do not capture
+        E2 - takes an immediate win, otherwise maximizes open windows for Black minus open windows for White
+        E3 - takes an immediate win, otherwise maximizes the pattern score (4^(k-1) per window of k tokens of one color)
+
+    Boards are flattened (games, n*n) int8 arrays, cell (x, y) at index x*n + y: 0 empty, 1 White, 2 Black, 3 block.
+    A window is a line of winning_size cells; windows are stored as flat cell indices.
+
+    Attributes:
+        board_size, winning_size
+        windows - (number of windows, winning_size) flat cell indices
+        membership - (number of windows, n*n) matrix, 1 where the cell belongs to the window
+    """
+
+    EMPTY = 0
+    WHITE = 1
+    BLACK = 2
+    BLOCK = 3
+
+    def __init__(self, board_size=3, winning_size=3, seed=None):
+        self.board_size = board_size
+        self.winning_size = winning_size
+        self.rng = np.random.default_rng(seed)
+
+        windows = []
+        n = board_size
+        for i in range(0, n):
+            for j in range(0, n):
+                for (di, dj) in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    cells = [(i + k * di, j + k * dj) for k in range(0, winning_size)]
+                    if all(0 <= x < n and 0 <= y < n for (x, y) in cells):
+                        windows.append([x * n + y for (x, y) in cells])
+        self.windows = np.array(windows, dtype=np.int64).reshape(-1, winning_size)
+        self.membership = np.zeros((len(windows), n * n), dtype=np.float64)
+        for w, cells in enumerate(windows):
+            self.membership[w, cells] = 1
+
+    def initial_boards(self, games, blocks=0):
+        """
+        :param games: number of games to simulate
+        :param blocks: a list of block coordinates shared by all games, or a number of blocks placed at random per game
+        :return: (games, n*n) int8 array of flattened boards
+        """
+        cells = self.board_size * self.board_size
+        boards = np.zeros((games, cells), dtype=np.int8)
+        if isinstance(blocks, int):
+            if blocks:
+                # a random permutation per game gives `blocks` distinct cells per game
+                order = np.argsort(self.rng.random((games, cells)), axis=1)[:, :blocks]
+                np.put_along_axis(boards, order, self.BLOCK, axis=1)
+        else:
+            for coord in blocks:
+                boards[:, coord[0] * self.board_size + coord[1]] = self.BLOCK
+        return boards
+
+    def window_counts(self, boards):
+        """
+        :param boards: (games, n*n) flattened boards
+        :return: counts of White tokens, Black tokens and blocks per (game, window)
+        """
+        cells = boards[:, self.windows]
+        return ((cells == self.WHITE).sum(axis=2), (cells == self.BLACK).sum(axis=2),
+                (cells == self.BLOCK).sum(axis=2))
+
+    def pattern_values(self, count_w, count_b, blocked):
+        """
+        E3-style value of every window: 4^(k-1) for k Black tokens only, the negation for White, otherwise 0
+        """
+        value = np.where(count_w == 0, np.where(count_b > 0, 4.0 ** (count_b - 1), 0.0), 0.0)
+        value -= np.where(count_b == 0, np.where(count_w > 0, 4.0 ** (count_w - 1), 0.0), 0.0)
+        return np.where(blocked, 0.0, value)
+
+    def move_scores(self, boards, mover, heuristic):
+        """
+        Scores every cell for the player to move, from that player's point of view (higher is better).
+        :param boards: (games, n*n) flattened boards
+        :param mover: WHITE or BLACK
+        :param heuristic: LineEmUp.E1, LineEmUp.E2 or LineEmUp.E3
+        :return: (games, n*n) scores, -inf on occupied cells
+        """
+        games, cells = boards.shape
+        count_w, count_b, count_x = self.window_counts(boards)
+        blocked = count_x > 0
+        own, other = (count_w, count_b) if mover == self.WHITE else (count_b, count_w)
+        # Black maximizes B - W scores, White minimizes them
+        sign = 1.0 if mover == self.BLACK else -1.0
+
+        if heuristic == LineEmUp.E1:
+            scores = np.zeros((games, cells))
+        else:
+            if heuristic == LineEmUp.E3:
+                before = self.pattern_values(count_w, count_b, blocked)
+                if mover == self.BLACK:
+                    after = self.pattern_values(count_w, count_b + 1, blocked)
+                else:
+                    after = self.pattern_values(count_w + 1, count_b, blocked)
+                scores = sign * ((after - before) @ self.membership)
+            else:
+                # playing a cell closes every open window of the opponent that contains it
+                open_other = ((own == 0) & ~blocked).astype(np.float64)
+                scores = open_other @ self.membership
+
+            winning = ((own == self.winning_size - 1) & (other == 0) & ~blocked).astype(np.float64)
+            scores += 1e6 * (winning @ self.membership > 0)
+
+        scores = scores + self.rng.random((games, cells)) * 0.5
+        return np.where(boards == self.EMPTY, scores, -np.inf)
+
+    def simulate(self, games=1000, blocks=0, heuristic_w=LineEmUp.E2, heuristic_b=LineEmUp.E2):
+        """
+        Plays `games` games to the end in lockstep.
+        :param games: number of games
+        :param blocks: list of block coordinates, or number of random blocks per game
+        :param heuristic_w: heuristic of White (plays first)
+        :param heuristic_b: heuristic of Black
+        :return: dict with win rates, tie rate and game length statistics
+        """
+        boards = self.initial_boards(games, blocks)
+        results = np.zeros(games, dtype=np.int8)
+        lengths = np.zeros(games, dtype=np.int64)
+        active = np.ones(games, dtype=bool)
+        all_games = np.arange(games)
+        mover = self.WHITE
+
+        while active.any():
+            heuristic = heuristic_w if mover == self.WHITE else heuristic_b
+            idx = all_games[active]
+            scores = self.move_scores(boards[idx], mover, heuristic)
+            moves = scores.argmax(axis=1)
+            boards[idx, moves] = mover
+            lengths[idx] += 1
+
+            count_w, count_b, _ = self.window_counts(boards[idx])
+            own = count_w if mover == self.WHITE else count_b
+            won = (own == self.winning_size).any(axis=1)
+            full = ~(boards[idx] == self.EMPTY).any(axis=1)
+            results[idx[won]] = mover
+            active[idx[won | full]] = False
+            mover = self.BLACK if mover == self.WHITE else self.WHITE
+
+        return {
+            'games': games,
+            'white_win_rate': float((results == self.WHITE).mean()),
+            'black_win_rate': float((results == self.BLACK).mean()),
+            'tie_rate': float((results == self.EMPTY).mean()),
+            'mean_length': float(lengths.mean()),
+            'std_length': float(lengths.std()),
+        }
+
+
+def screen(configs, games=1000, seed=None):
+    """
+    Runs the batch simulator for a list of configs, e.g. to compare block layouts and (n, s) combinations.
+    :param configs: dicts with "n", "s", optionally "blocks" (list of coordinates or a number of random blocks),
+                    "heuristic_w" and "heuristic_b"
+    :param games: games per config
+    :param seed:
+    :return: list of (config, result) pairs
+    """
+    results = []
+    for config in configs:
+        simulator = BatchSimulator(config["n"], config["s"], seed)
+        result = simulator.simulate(games, config.get("blocks", 0), config.get("heuristic_w", LineEmUp.E2),
+                                    config.get("heuristic_b", LineEmUp.E2))
+        results.append((config, result))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Screen LineEmUp configurations with vectorized 1-ply self-play.')
+    parser.add_argument('n', type=int, help='board size')
+    parser.add_argument('s', type=int, help='winning size')
+    parser.add_argument('--blocks', type=int, default=0, help='number of random blocks per game')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    for heuristic_w in (LineEmUp.E1, LineEmUp.E2, LineEmUp.E3):
+        for heuristic_b in (LineEmUp.E1, LineEmUp.E2, LineEmUp.E3):
+            simulator = BatchSimulator(args.n, args.s, args.seed)
+            result = simulator.simulate(args.games, args.blocks, heuristic_w, heuristic_b)
+            print(F'W {LineEmUp.HEURISTIC_NAMES[heuristic_w]} vs B {LineEmUp.HEURISTIC_NAMES[heuristic_b]}: '
+                  F'W {result["white_win_rate"]:.3f}  B {result["black_win_rate"]:.3f}  '
+                  F'tie {result["tie_rate"]:.3f}  length {result["mean_length"]:.1f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import os
+import pickle
+import time
+
+
+class Checkpoint:
+    """
+    Local file holding the latest snapshot of a long computation (a game, a search or a ScoreBoard config),
+    so that a restarted job resumes from it instead of starting over.
+
+    Snapshots are taken at most once every interval seconds (see due()) to keep the overhead bounded, and are
+    written to a temporary file that then replaces the checkpoint, so a job preempted while saving still
+    leaves the previous snapshot intact.
+
+    Attributes:
+        path - checkpoint file
+        interval - minimum number of seconds between two snapshots (0 saves at every opportunity)
+    """
+
+    def __init__(self, path, interval=60.0):
+        self.path = path
+        self.interval = interval
+        self.last_save = time.time()
+
+    def due(self):
+        """
+        :return: whether interval seconds have passed since the last snapshot
+        """
+        return time.time() - self.last_save >= self.interval
+
+    def save(self, snapshot):
+        """
+        :param snapshot: picklable snapshot
+        :return:
+        """
+        temporary = self.path + '.tmp'
+        with open(temporary, 'wb') as file:
+            pickle.dump(snapshot, file)
+        os.replace(temporary, self.path)
+        self.last_save = time.time()
+
+    def load(self):
+        """
+        :return: the last snapshot saved, or None if there is none (or it cannot be read)
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'rb') as file:
+                return pickle.load(file)
+        except (EOFError, pickle.UnpicklingError):
+            return None
+
+    def clear(self):
+        """
+        Removes the checkpoint once the computation has completed
+        :return:
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
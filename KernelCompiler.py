@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import argparse
+import random
+import time
+
+
+class KernelCompiler:
+    """
+    Generates and compiles the is_end() and E2 kernels of LineEmUp for one board configuration.
+
+    Board size, winning size and blocks are fixed for a whole game, so the generated functions unpack the rows
+    of the board into one local per cell (skipping blocks) and test every window of winning_size cells with
+    hard-coded names instead of looping over the board, calling valid_coord() and testing for blocks.
+
+        is_end(state) - 'W' or 'B' if it holds a complete window, '.' if the board is full, None otherwise.
+                        Windows are tested in the order the generic scan meets them.
+        e2(state) - windows free of White minus windows free of Black (blocked windows never count),
+                    i.e. the E2 score of a state that is not over
+    """
+
+    def __init__(self, board_size, winning_size, blocks, windows):
+        """
+        :param board_size:
+        :param winning_size:
+        :param blocks: coordinates of the blocks
+        :param windows: block-free windows as flat cell indices, in scan order (see LineEmUp.get_windows())
+        """
+        self.board_size = board_size
+        self.winning_size = winning_size
+        self.blocks = frozenset((coord[0], coord[1]) for coord in blocks)
+        self.windows = windows
+
+    def cell(self, index):
+        return F'c{index // self.board_size}_{index % self.board_size}'
+
+    def unpack_rows(self):
+        """
+        :return: source lines binding every cell that is not a block to a local
+        """
+        lines = []
+        for x in range(0, self.board_size):
+            names = ['_' if (x, y) in self.blocks else self.cell(x * self.board_size + y)
+                     for y in range(0, self.board_size)]
+            lines.append(F"    ({', '.join(names)},) = state[{x}]")
+        return lines
+
+    def is_end_source(self):
+        lines = ['def is_end(state):'] + self.unpack_rows()
+        for window in self.windows:
+            cells = [self.cell(index) for index in window]
+            # only player tokens win, even if a block the kernel was not compiled for sits in the window
+            lines.append(F"    if {cells[0]} in ('W', 'B') and {' == '.join(cells)}:")
+            lines.append(F'        return {cells[0]}')
+
+        empty = [self.cell(x * self.board_size + y) for x in range(0, self.board_size)
+                 for y in range(0, self.board_size) if (x, y) not in self.blocks]
+        if empty:
+            lines.append(F"    if '.' in ({', '.join(empty)},):")
+            lines.append('        return None')
+        lines.append("    return '.'")
+        return '\n'.join(lines) + '\n'
+
+    def e2_source(self):
+        lines = ['def e2(state):'] + self.unpack_rows()
+        lines.append('    winning_w = 0')
+        lines.append('    winning_b = 0')
+        for window in self.windows:
+            cells = [self.cell(index) for index in window]
+            lines.append(F"    if {' and '.join(cell + ' != ' + repr('B') for cell in cells)}:")
+            lines.append('        winning_w += 1')
+            lines.append(F"    if {' and '.join(cell + ' != ' + repr('W') for cell in cells)}:")
+            lines.append('        winning_b += 1')
+        lines.append('    return winning_b - winning_w')
+        return '\n'.join(lines) + '\n'
+
+    def compile(self):
+        """
+        :return: (is_end, e2) functions taking the board as a list of rows
+        """
+        name = F'<kernels n={self.board_size} s={self.winning_size} blocks={sorted(self.blocks)}>'
+        namespace = {}
+        exec(compile(self.is_end_source() + '\n' + self.e2_source(), name, 'exec'), namespace)
+        return namespace['is_end'], namespace['e2']
+
+
+def random_state(game, rng):
+    """
+    Fills the empty cells of a game with random tokens
+    """
+    for x in range(0, game.board_size):
+        for y in range(0, game.board_size):
+            if game.current_state[x][y] != 'x':
+                game.current_state[x][y] = rng.choice('..WB')
+
+
+def check(game, states=2000, seed=0):
+    """
+    Compares the compiled kernels of a game with the generic scans on random states
+    :return: number of states where they disagree
+    """
+    rng = random.Random(seed)
+    mismatches = 0
+    for _ in range(states):
+        random_state(game, rng)
+        end = game.scan_end()
+        if game.is_end_kernel(game.current_state) != end:
+            mismatches += 1
+        elif end is None and game.e2_kernel(game.current_state) != game.scan_windows():
+            mismatches += 1
+    return mismatches
+
+
+def benchmark(game, states=2000, seed=0):
+    """
+    :return: (generic seconds, compiled seconds) to evaluate is_end and the E2 score of random states
+    """
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(states):
+        random_state(game, rng)
+        boards.append([row[:] for row in game.current_state])
+
+    start = time.perf_counter()
+    for board in boards:
+        game.current_state = board
+        game.scan_end()
+        game.scan_windows()
+    generic = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for board in boards:
+        game.is_end_kernel(board)
+        game.e2_kernel(board)
+    compiled = time.perf_counter() - start
+    return generic, compiled
+
+
+def main():
+    from LineEmUp import LineEmUp
+
+    parser = argparse.ArgumentParser(description='Check and benchmark the compiled is_end/E2 kernels.')
+    parser.add_argument('board_size', type=int)
+    parser.add_argument('winning_size', type=int)
+    parser.add_argument('--blocks', type=int, default=0)
+    parser.add_argument('--states', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cells = [(x, y) for x in range(0, args.board_size) for y in range(0, args.board_size)]
+    blocks = rng.sample(cells, args.blocks)
+    game = LineEmUp(board_size=args.board_size, blocks=args.blocks, blocks_coord=blocks,
+                    winning_size=args.winning_size)
+
+    print(F'mismatches: {check(game, args.states, args.seed)}')
+    generic, compiled = benchmark(game, args.states, args.seed)
+    print(F'generic: {generic:.3f}s  compiled: {compiled:.3f}s  speedup: {generic / compiled:.1f}x')
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,18 @@
 
 # based on code from https://stackabuse.com/minimax-and-alpha-beta-pruning-in-python
 
+import math
+import os
 import time
 import random
 from PrintManager import PrintManager
+from Checkpoint import Checkpoint
+from KernelCompiler import KernelCompiler
+from Position import Position
+from SearchController import SearchAborted, SearchController
+from ProofNumberSearch import ProofNumberSearch
+from SearchTelemetry import SearchTelemetry
+from TranspositionTable import SharedTranspositionTable
 
 
 class LineEmUp:
@@ -15,10 +24,24 @@ class LineEmUp:
     AI = 1
     E1 = 0
     E2 = 1
+    E3 = 2
+    HEURISTIC_NAMES = {E1: 'E1', E2: 'E2', E3: 'E3'}
+
+    # E3 pattern tables per winning size, and E3 windows per (board size, winning size, blocks)
+    pattern_tables = {}
+    pattern_windows = {}
+
+    # Zobrist keys per (board size, winning size)
+    zobrist_keys = {}
+
+    # compiled is_end/E2 kernels per (board size, winning size, blocks)
+    kernels = {}
 
     def __init__(self, board_size=3, blocks=0, blocks_coord=[], winning_size=3, d1=7, d2=7,
                  max_move_time=5, player_w=AI, player_b=AI, recommend=True, heuristic_w=E2, heuristic_b=E2,
-                 a1=ALPHABETA, a2=ALPHABETA):
+                 a1=ALPHABETA, a2=ALPHABETA, telemetry=False, lmr=False, lmr_min_moves=3, lmr_reduction=1,
+                 futility=False, futility_margin=3, transposition_table=None, pns=False, pns_nodes=20000,
+                 pns_time=None, checkpoint=None, checkpoint_interval=60.0, controller=None):
         """
         Constructor for the game.
 
@@ -36,6 +59,27 @@ class LineEmUp:
         :param heuristic_b:
         :param a1:
         :param a2:
+        :param telemetry: record branching factor, cutoff and move-ordering statistics of alphabeta()
+        :param lmr: late move reductions in alphabeta(): non-forcing moves searched after the first lmr_min_moves
+                    get a search reduced by lmr_reduction plies, and a full depth re-search if they improve the window
+        :param lmr_min_moves:
+        :param lmr_reduction: rounded up to an even number of plies so that reduced searches end on the same
+                              player's horizon; moves are only reduced with more plies than that left below them,
+                              so with the default of 1 (i.e. 2) LMR has no effect at depths below 4
+        :param futility: futility pruning in alphabeta(): one ply above the horizon, skip non-forcing moves whose
+                         static E2 score is more than futility_margin outside the alpha/beta window. Only players
+                         searching with E2 prune, since the margin is in E2 units
+        :param futility_margin:
+        :param transposition_table: SharedTranspositionTable probed and filled by alphabeta(), possibly shared with
+                                    searches running in other processes
+        :param pns: before each AI move, run a proof-number search and play its move if it proves a win
+        :param pns_nodes: node budget of the proof-number search
+        :param pns_time: time budget of the proof-number search (defaults to half of max_move_time)
+        :param checkpoint: file play() snapshots the game into (between moves and between root moves of a search),
+                           and resumes from when it is restarted
+        :param checkpoint_interval: minimum number of seconds between two snapshots
+        :param controller: SearchController enforcing max_move_time on the searches, which also lets another
+                           thread or process cancel them (a new one by default)
         """
 
         self.board_size = board_size
@@ -45,7 +89,6 @@ class LineEmUp:
         self.max_move_time = max_move_time
         self.recommend = recommend
         self.result = None
-        self.timer_is_up = False
         self.d1 = d1
         self.d2 = d2
         self.a1 = a1
@@ -54,6 +97,21 @@ class LineEmUp:
         self.player_b = player_b
         self.heuristic_w = heuristic_w
         self.heuristic_b = heuristic_b
+        self.record_telemetry = telemetry
+        self.lmr = lmr
+        self.lmr_min_moves = lmr_min_moves
+        self.lmr_reduction = lmr_reduction
+        self.futility = futility
+        self.futility_margin = futility_margin
+        self.transposition_table = transposition_table
+        self.pns = pns
+        self.pns_nodes = pns_nodes
+        self.pns_time = pns_time
+        # optional ProgressReporter notified after every move; the game is not echoed to the console while
+        # it draws a status line (see console_echo())
+        self.progress = None
+        self.checkpoint = Checkpoint(checkpoint, checkpoint_interval) if checkpoint is not None else None
+        self.controller = controller if controller is not None else SearchController()
 
         self.initialize_game()
 
@@ -75,6 +133,25 @@ class LineEmUp:
         self.depth_averages = []
         self.ard_per_move = []
         self.ard_averages = []
+        self.move_times = []
+        self.move_state_counts = []
+        self.telemetry = SearchTelemetry() if self.record_telemetry else None
+        self.search_counts = {}
+        self.total_search_counts = {}
+
+        # moves played so far as (token, x, y)
+        self.history = []
+        # root moves of the current search in search order, and (x, y, value) of those completed
+        self.root_moves = None
+        self.root_results = []
+        # search state of the move a restored checkpoint was taken in
+        self.resume_move = None
+        # length of the game trace before the current move, and that of the trace of a restored checkpoint
+        self.trace_offset = None
+        self.resume_trace = None
+        # whether the value last returned by alphabeta() is a win or loss found below, whose magnitude depends
+        # on the ply it was found at (None if unknown, i.e. the best root result was restored from a checkpoint)
+        self.win_score = False
 
         self.initialize_board()
 
@@ -95,6 +172,12 @@ class LineEmUp:
         # set Block nodes
         self.initialize_blocks(self.blocks, self.blocks_coord)
 
+        # windows and pattern table used by E3
+        self.windows = self.get_windows()
+        self.pattern_table = self.get_pattern_table(self.winning_size)
+        (self.is_end_kernel, self.e2_kernel) = self.get_kernels()
+        self.zobrist = self.get_zobrist_keys(self.board_size, self.winning_size)
+
         # Player White always plays first
         self.player_turn = 'W'
         self.heuristic = self.heuristic_w
@@ -114,6 +197,37 @@ class LineEmUp:
         for coord in blocks_coord:
             self.current_state[coord[0]][coord[1]] = 'x'
 
+    def get_position(self):
+        """
+        :return: the current state and turn player as a Position
+        """
+        return Position(self.board_size, self.winning_size, self.current_state, self.player_turn)
+
+    def set_position(self, position):
+        """
+        Loads a position (e.g. a mid-game position to benchmark or reproduce a bug) without replaying its moves.
+        The board size, winning size and blocks of the game are replaced by those of the position.
+        :param position: Position, or its integer or text encoding
+        :return:
+        """
+        if isinstance(position, int):
+            position = Position.from_int(position)
+        elif isinstance(position, str):
+            position = Position.from_text(position)
+
+        self.board_size = position.board_size
+        self.winning_size = position.winning_size
+        self.blocks_coord = position.blocks
+        self.blocks = len(self.blocks_coord)
+        self.initialize_board()
+
+        for x in range(0, self.board_size):
+            for y in range(0, self.board_size):
+                self.current_state[x][y] = position.cells[x][y]
+
+        if position.turn == 'B':
+            self.switch_player()
+
     def draw_board(self, printer):
         """
         Prints the board to the console
@@ -152,6 +266,19 @@ class LineEmUp:
 
     def is_end(self):
         """
+        Checks if the game is over, with the kernel compiled for the configuration of the game (see get_kernels()).
+        Returns any of the following:
+            - W if White is the winner
+            - B if Black is the winner
+            - . if it's a tie
+            - None if the game is not over
+        :return: the winner (W,B, or . for tie) or None
+        """
+        return self.is_end_kernel(self.current_state)
+
+    def scan_end(self):
+        """
+        Generic version of is_end(), scanning the whole board; the compiled kernel must agree with it.
         Checks if the game is over.
         The game is over if any of the following occur:
             - A player has n consecutive tokens in a horizontal row
@@ -245,15 +372,23 @@ class LineEmUp:
         self.result = self.is_end()
         # Printing the appropriate message if the game has ended
         if self.result is not None:
-            if self.result == 'W':
-                print('The winner is White!')
-            elif self.result == 'B':
-                print('The winner is Black!')
-            elif self.result == '.':
-                print("It's a tie!")
+            if self.console_echo():
+                if self.result == 'W':
+                    print('The winner is White!')
+                elif self.result == 'B':
+                    print('The winner is Black!')
+                elif self.result == '.':
+                    print("It's a tie!")
             self.initialize_board()
         return self.result
 
+    def console_echo(self):
+        """
+        :return: whether the game is printed to the console, which it is not while a ProgressReporter
+                 (see the progress attribute) rewrites its status line there
+        """
+        return self.progress is None or self.progress.stream is None
+
     def input_move(self):
         """
         Prompts player move
@@ -310,64 +445,67 @@ class LineEmUp:
         random.shuffle(cols)
 
         # Iterate through every possible move (i, j)
-        for i in range(0, self.board_size):
-            for j in range(0, self.board_size):
+        moves = [(i, j) for i in range(0, self.board_size) for j in range(0, self.board_size)]
+        root = current_depth == 1
+        if root:
+            moves = self.resume_root(moves)
+            for (i, j, v) in self.root_results:
+                if (max_turn and v > value) or (not max_turn and v < value):
+                    value = v
+                    x = i
+                    y = j
+
+        for (i, j) in moves:
+
+            # Only consider valid moves (i.e. cells that are empty)
+            if self.current_state[i][j] == '.':
+
+                # unwinds the search once the move time is spent or the search is cancelled
+                self.controller.check(current_depth)
+
+                # end traversal if resources are spent
+                end_of_traversal = current_depth == self.max_depth
+
+                if max_turn:
+                    self.current_state[i][j] = 'B'
+                    if end_of_traversal or self.is_end():
+                        self.depths.append(current_depth)
+                        self.ard_per_move.append(current_depth)
+                        v = self.evaluate(current_depth)
+                    else:
+                        (v, _, _) = self.minimax(current_depth, max_turn=False)
+                    if v > value:
+                        value = v
+                        x = i
+                        y = j
+                else:
+                    self.current_state[i][j] = 'W'
+                    if end_of_traversal or self.is_end():
+                        self.depths.append(current_depth)
+                        self.ard_per_move.append(current_depth)
+                        v = self.evaluate(current_depth)
+                    else:
+                        # current_depth = current_depth + 1
+                        (v, _, _) = self.minimax(current_depth, max_turn=True)
+                    if v < value:
+                        value = v
+                        x = i
+                        y = j
 
-                # Only consider valid moves (i.e. cells that are empty)
-                if self.current_state[i][j] == '.':
+                # increase state count
+                self.state_count = self.state_count + 1
+                 # add state count to depth
+                if current_depth not in self.state_count_p_depth:
+                    self.state_count_p_depth[current_depth] = 0
 
-                    # Update timer
-                    if time.time() - self.move_start > self.max_move_time:
-                        self.timer_is_up = True
-
-                    # end traversal if resources are spent
-                    end_of_traversal = current_depth == self.max_depth
-
-                    if max_turn:
-                        self.current_state[i][j] = 'B'
-                        if end_of_traversal or self.is_end() or self.timer_is_up:
-                            self.depths.append(current_depth)
-                            self.ard_per_move.append(current_depth)
-                            if self.heuristic == self.E1:
-                                v = self.e()
-                            else:
-                                v = self.e2(current_depth)
-                        else:
-                            (v, _, _) = self.minimax(current_depth, max_turn=False)
-                        if v > value:
-                            value = v
-                            x = i
-                            y = j
-                    else:
-                        self.current_state[i][j] = 'W'
-                        if end_of_traversal or self.is_end() or self.timer_is_up:
-                            self.depths.append(current_depth)
-                            self.ard_per_move.append(current_depth)
-                            if self.heuristic == self.E1:
-                                v = self.e()
-                            else:
-                                v = self.e2(current_depth)
-                        else:
-                            # current_depth = current_depth + 1
-                            (v, _, _) = self.minimax(current_depth, max_turn=True)
-                        if v < value:
-                            value = v
-                            x = i
-                            y = j
-
-                    # increase state count
-                    self.state_count = self.state_count + 1
-                     # add state count to depth
-                    if current_depth not in self.state_count_p_depth:
-                        self.state_count_p_depth[current_depth] = 0
-
-                    self.state_count_p_depth[current_depth] += 1
-
-                    # Reset cell so that state is not permanently modified by A.I. traversal
-                    self.current_state[i][j] = '.'
-
-                    if (self.timer_is_up):
-                        return value, x, y
+                self.state_count_p_depth[current_depth] += 1
+
+                # Reset cell so that state is not permanently modified by A.I. traversal
+                self.current_state[i][j] = '.'
+
+                if root:
+                    self.root_results.append((i, j, v))
+                    self.save_checkpoint()
 
         self.ard_per_move[0] = sum(self.ard_per_move) / len(self.ard_per_move)
         self.ard_per_move = self.ard_per_move[0:]
@@ -376,15 +514,18 @@ class LineEmUp:
         # print("LEAVING STATE SO NOT IN INFINITE LOOP WOO!")
         return value, x, y
 
-    def alphabeta(self, current_depth=0, alpha=-100, beta=100, max_turn=False):
+    def alphabeta(self, current_depth=0, alpha=-100, beta=100, max_turn=False, max_depth=None):
         """
         A more efficient version of minimax (i.e. includes pruning)
         :param current_depth: required to determine when to stop traversing
         :param alpha: required for pruning
         :param beta: required for pruning
         :param max_turn: boolean to decide which computation will be used (max or min)
+        :param max_depth: depth at which to stop traversing (defaults to the turn player's depth, lower in reduced searches)
         :return: the value of the heuristic being propagated along with the X,Y coordinates of the best computed move
         """
+        if max_depth is None:
+            max_depth = self.max_depth
 
         value = 101
         if max_turn:
@@ -393,6 +534,38 @@ class LineEmUp:
         y = None
 
         ard = []
+        children = 0
+        win_score = False
+        alpha_original = alpha
+        beta_original = beta
+        remaining = max_depth - current_depth
+
+        # Probe the transposition table: reuse a deep enough result, otherwise try its best move first
+        key = None
+        table_move = None
+        if self.transposition_table is not None:
+            key = self.position_key(max_turn)
+            entry = self.transposition_table.probe(key)
+            if entry is not None:
+                (entry_depth, bound, entry_value, move) = entry
+                win_score = bool(bound & SharedTranspositionTable.WIN)
+                bound &= ~SharedTranspositionTable.WIN
+                if win_score:
+                    entry_value = self.from_table(entry_value, current_depth)
+                if move != SharedTranspositionTable.NO_MOVE:
+                    table_move = divmod(move, self.board_size)
+                    if not self.is_valid_play(*table_move):
+                        table_move = None
+                if current_depth > 0 and table_move is not None and entry_depth >= remaining:
+                    if bound == SharedTranspositionTable.EXACT or (
+                            bound == SharedTranspositionTable.LOWER and entry_value >= beta) or (
+                            bound == SharedTranspositionTable.UPPER and entry_value <= alpha):
+                        # the stored value stands for a search down to max_depth
+                        self.count_search('table_hits')
+                        self.depths.append(max_depth)
+                        self.ard_per_move.append(max_depth)
+                        self.win_score = win_score
+                        return entry_value, table_move[0], table_move[1]
 
         current_depth = current_depth + 1
 
@@ -401,92 +574,349 @@ class LineEmUp:
         random.shuffle(rows)
         cols = [*range(0, self.board_size)]
         random.shuffle(cols)
+        moves = [(i, j) for i in rows for j in cols]
+        if table_move is not None:
+            moves.remove(table_move)
+            moves.insert(0, table_move)
+
+        # at the root, skip the moves a restored checkpoint has results for
+        root = current_depth == 1
+        if root:
+            moves = self.resume_root(moves)
+            for (i, j, v) in self.root_results:
+                children += 1
+                if (max_turn and v > value) or (not max_turn and v < value):
+                    value = v
+                    x = i
+                    y = j
+                    win_score = None
+                if max_turn:
+                    if value > alpha:
+                        alpha = value
+                else:
+                    if value < beta:
+                        beta = value
 
-        for i in rows:
-            for j in cols:
+        for (i, j) in moves:
 
-                # Only consider valid moves (i.e. cells that are empty)
-                if self.current_state[i][j] == '.':
+            # Only consider valid moves (i.e. cells that are empty)
+            if self.current_state[i][j] == '.':
+                children += 1
+
+                # unwinds the search once the move time is spent or the search is cancelled
+                self.controller.check(current_depth)
+
+                # end traversal if resources are spent
+                end_of_traversal = current_depth >= max_depth
 
-                    # Update timer
-                    if time.time() - self.move_start > self.max_move_time:
-                        self.timer_is_up = True
-
-                    # If timer has expired, stop traversing and set the current depth as max depth
-                    # if not self.timer_is_up and move_time >= self.max_move_time :
-                    #     self.max_depth_adjusted = current_depth
-                    #     self.timer_is_up = True
-
-                    # end traversal if resources are spent
-                    end_of_traversal = current_depth == self.max_depth
-
-                    if max_turn:
-                        self.current_state[i][j] = 'B'
-                        if end_of_traversal or self.is_end() or self.timer_is_up:
-                            self.depths.append(current_depth)
-                            self.ard_per_move.append(current_depth)
-
-                            if self.heuristic == self.E1:
-                                v = self.e()
-                            else:
-                                v = self.e2(current_depth)
-                        else:
-                            (v, _, _) = self.alphabeta(current_depth, alpha, beta, max_turn=False)
-                        if v > value:
-                            value = v
-                            x = i
-                            y = j
+                if max_turn:
+                    self.current_state[i][j] = 'B'
+                    if end_of_traversal or self.is_end():
+                        self.depths.append(current_depth)
+                        self.ard_per_move.append(current_depth)
+
+                        v = self.evaluate(current_depth)
+                        child_win_score = key is not None and self.is_win()
                     else:
-                        self.current_state[i][j] = 'W'
-                        if end_of_traversal or self.is_end() or self.timer_is_up:
-                            self.depths.append(current_depth)
-                            self.ard_per_move.append(current_depth)
-
-                            if self.heuristic == self.E1:
-                                v = self.e()
-                            else:
-                                v = self.e2(current_depth)
-
-                        else:
-                            # current_depth = current_depth + 1
-                            (v, _, _) = self.alphabeta(current_depth, alpha, beta, max_turn=True)
-                        if v < value:
-                            value = v
-                            x = i
-                            y = j
-
-                    # increase state count
-                    self.state_count = self.state_count + 1
-                    # add state count to depth
-                    if current_depth not in self.state_count_p_depth:
-                        self.state_count_p_depth[current_depth] = 0
-
-                    self.state_count_p_depth[current_depth] += 1
-
-                    # Reset cell so that state is not permanently modified by A.I. traversal
-                    self.current_state[i][j] = '.'
-
-                    if (self.timer_is_up):
-                        return value, x, y
-
-                    # Prune unnecessary siblings
-                    if max_turn:
-                        if value >= beta:
-                            return value, x, y
-                        if value > alpha:
-                            alpha = value
+                        v = self.search_child(i, j, current_depth, alpha, beta, max_turn, max_depth, children)
+                        child_win_score = self.win_score
+                    if v > value:
+                        value = v
+                        x = i
+                        y = j
+                        win_score = child_win_score
+                else:
+                    self.current_state[i][j] = 'W'
+                    if end_of_traversal or self.is_end():
+                        self.depths.append(current_depth)
+                        self.ard_per_move.append(current_depth)
+
+                        v = self.evaluate(current_depth)
+                        child_win_score = key is not None and self.is_win()
+
                     else:
-                        if value <= alpha:
-                            return value, x, y
-                        if value < beta:
-                            beta = value
+                        v = self.search_child(i, j, current_depth, alpha, beta, max_turn, max_depth, children)
+                        child_win_score = self.win_score
+                    if v < value:
+                        value = v
+                        x = i
+                        y = j
+                        win_score = child_win_score
+
+                # increase state count
+                self.state_count = self.state_count + 1
+                # add state count to depth
+                if current_depth not in self.state_count_p_depth:
+                    self.state_count_p_depth[current_depth] = 0
+
+                self.state_count_p_depth[current_depth] += 1
+
+                # Reset cell so that state is not permanently modified by A.I. traversal
+                self.current_state[i][j] = '.'
+
+                # Prune unnecessary siblings
+                if (max_turn and value >= beta) or (not max_turn and value <= alpha):
+                    if self.telemetry is not None:
+                        self.telemetry.cutoff(current_depth, children)
+                        self.telemetry.node(current_depth, children)
+                    if key is not None:
+                        self.store_position(key, current_depth - 1, remaining, value, win_score, alpha_original,
+                                            beta_original, x, y)
+                    self.win_score = win_score
+                    return value, x, y
+                if max_turn:
+                    if value > alpha:
+                        alpha = value
+                else:
+                    if value < beta:
+                        beta = value
+
+                if root:
+                    self.root_results.append((i, j, v))
+                    self.save_checkpoint()
+
+        if self.telemetry is not None:
+            self.telemetry.node(current_depth, children)
+        if key is not None:
+            self.store_position(key, current_depth - 1, remaining, value, win_score, alpha_original, beta_original,
+                                x, y)
 
         self.ard_per_move[0] = sum(self.ard_per_move) / len(self.ard_per_move)
         self.ard_per_move = self.ard_per_move[0:]
         
 
+        self.win_score = win_score
+        return value, x, y
+
+    def search(self, max_turn):
+        """
+        Searches the move of the turn player with its algorithm, within the controller's limits.
+        A search that runs out of time or is cancelled is unwound and replaced by its last completed result
+        (see last_completed()), so partially searched moves never decide the move played.
+        :param max_turn: whether Black is to play
+        :return: (value, x, y)
+        """
+        board = [row[:] for row in self.current_state]
+        try:
+            if self.algo == self.MINIMAX:
+                return self.minimax(max_turn=max_turn)
+            return self.alphabeta(max_turn=max_turn)
+        except SearchAborted as abort:
+            # the unwound nodes left their moves on the board
+            for (row, saved) in zip(self.current_state, board):
+                row[:] = saved
+            if self.telemetry is not None and abort.ply is not None:
+                self.telemetry.abort(abort.ply)
+            return self.last_completed(max_turn)
+
+    def last_completed(self, max_turn):
+        """
+        Result of a stopped search: the best root move whose search completed or, if none did, the best
+        move according to the heuristic of the states one move ahead.
+        :param max_turn: whether Black is to play
+        :return: (value, x, y)
+        """
+        if self.ard_per_move:
+            self.ard_per_move[0] = sum(self.ard_per_move) / len(self.ard_per_move)
+        results = self.root_results
+        if not results:
+            token = 'B' if max_turn else 'W'
+            results = []
+            for (i, j) in self.root_moves or []:
+                if self.current_state[i][j] != '.':
+                    continue
+                self.current_state[i][j] = token
+                results.append((i, j, self.evaluate(1)))
+                self.current_state[i][j] = '.'
+        best = max if max_turn else min
+        (x, y, value) = best(results, key=lambda result: result[2])
         return value, x, y
 
+    def position_key(self, max_turn):
+        """
+        Zobrist key of the current state for the transposition table. It also covers the blocks, the turn and
+        the heuristic of the searching player, since values of different heuristics must not be mixed.
+        :param max_turn: whether Black is to play
+        :return: 64 bit key
+        """
+        (white_keys, black_keys, block_keys, turn_key, heuristic_keys) = self.zobrist
+        key = heuristic_keys[self.heuristic]
+        if max_turn:
+            key ^= turn_key
+        index = 0
+        for row in self.current_state:
+            for cell in row:
+                if cell == 'W':
+                    key ^= white_keys[index]
+                elif cell == 'B':
+                    key ^= black_keys[index]
+                elif cell == 'x':
+                    key ^= block_keys[index]
+                index += 1
+        return key
+
+    @staticmethod
+    def get_zobrist_keys(board_size, winning_size):
+        """
+        Random keys per (cell, token), for the turn and per heuristic. They are drawn from a seed fixed by
+        the board and winning sizes, so every process computes the same keys and can share a transposition table.
+        :param board_size:
+        :param winning_size:
+        :return: (white keys, black keys, block keys, turn key, heuristic keys)
+        """
+        if (board_size, winning_size) not in LineEmUp.zobrist_keys:
+            rng = random.Random(board_size * 1000 + winning_size)
+            cells = board_size * board_size
+            LineEmUp.zobrist_keys[(board_size, winning_size)] = (
+                [rng.getrandbits(64) for i in range(cells)],
+                [rng.getrandbits(64) for i in range(cells)],
+                [rng.getrandbits(64) for i in range(cells)],
+                rng.getrandbits(64),
+                {heuristic: rng.getrandbits(64) for heuristic in LineEmUp.HEURISTIC_NAMES})
+        return LineEmUp.zobrist_keys[(board_size, winning_size)]
+
+    def store_position(self, key, ply, remaining, value, win_score, alpha, beta, x, y):
+        """
+        Stores the result of a node in the transposition table.
+        The table outlives the search, so a win or loss is stored relative to the node (see to_table()) and
+        flagged WIN; a value not known to be a heuristic score or a win is not stored.
+        :param key: key of the node
+        :param ply: ply of the node (0 at the root)
+        :param remaining: number of plies searched below the node
+        :param value: value found
+        :param win_score: whether value is a win or loss found below the node, or None if unknown
+        :param alpha: alpha when the node was entered
+        :param beta: beta when the node was entered
+        :param x:
+        :param y:
+        :return:
+        """
+        if win_score is None:
+            return
+        if value <= alpha:
+            bound = SharedTranspositionTable.UPPER
+        elif value >= beta:
+            bound = SharedTranspositionTable.LOWER
+        else:
+            bound = SharedTranspositionTable.EXACT
+        if win_score:
+            bound |= SharedTranspositionTable.WIN
+            value = self.to_table(value, ply)
+        move = SharedTranspositionTable.NO_MOVE if x is None else x * self.board_size + y
+        self.transposition_table.store(key, remaining, bound, value, move)
+
+    @staticmethod
+    def to_table(value, ply):
+        """
+        A win or loss found at depth d scores 100 / (d + 1) (see e2()). Seen from a node at ply p, the same
+        outcome is d - p plies away, so it is stored with the score it would have if the node were the root.
+        :param value: win or loss score of a node
+        :param ply: ply of the node
+        :return: the score relative to the node
+        """
+        distance = round(100 / abs(value)) - 1 - ply
+        return math.copysign(100 * (1 / (distance + 1)), value)
+
+    @staticmethod
+    def from_table(value, ply):
+        """
+        Inverse of to_table(): the score of a stored win or loss for the node probed at ply
+        :param value: win or loss score relative to the node
+        :param ply: ply of the node
+        :return:
+        """
+        distance = round(100 / abs(value)) - 1
+        return math.copysign(100 * (1 / (ply + distance + 1)), value)
+
+    def is_win(self):
+        """
+        :return: whether evaluate() scores the current state as a win or loss, i.e. by its ply
+        """
+        return self.heuristic != self.E1 and self.is_end() in ('W', 'B')
+
+    def search_child(self, i, j, current_depth, alpha, beta, max_turn, max_depth, children):
+        """
+        Searches the state reached by the move (i, j), which has already been played on the board,
+        applying futility pruning and late move reductions when they are enabled.
+        :param i:
+        :param j:
+        :param current_depth: depth of the move
+        :param alpha:
+        :param beta:
+        :param max_turn: whether the move was made by the maximizing player
+        :param max_depth: depth at which the search of the node stops
+        :param children: number of moves searched so far at the node, including this one
+        :return: the value of the child
+        """
+        remaining = max_depth - current_depth
+
+        # the static score and margin are in E2 units, so only E2 searches can compare them with alpha/beta
+        if self.futility and self.heuristic == self.E2 and remaining == 1 and not self.is_forcing(i, j):
+            static = self.e2(current_depth, timed=False)
+            self.win_score = False
+            if max_turn and static + self.futility_margin <= alpha:
+                self.count_search('futility_prunes')
+                return static + self.futility_margin
+            if not max_turn and static - self.futility_margin >= beta:
+                self.count_search('futility_prunes')
+                return static - self.futility_margin
+
+        # reductions are rounded up to an even number of plies: a reduced search ending on the other player's
+        # horizon always looks worse for the mover, so it would never fail high and LMR would silently prune
+        reduction = self.lmr_reduction + self.lmr_reduction % 2
+        if self.lmr and children > self.lmr_min_moves and remaining > reduction and not self.is_forcing(i, j):
+            self.count_search('lmr_reductions')
+            reduced_depth = max_depth - reduction
+            (v, _, _) = self.alphabeta(current_depth, alpha, beta, not max_turn, reduced_depth)
+
+            # re-search at full depth if the reduced search says the move would improve the window (fail high)
+            if (max_turn and v > alpha) or (not max_turn and v < beta):
+                self.count_search('lmr_researches')
+                (v, _, _) = self.alphabeta(current_depth, alpha, beta, not max_turn, max_depth)
+            return v
+
+        (v, _, _) = self.alphabeta(current_depth, alpha, beta, not max_turn, max_depth)
+        return v
+
+    def is_forcing(self, i, j):
+        """
+        A move is forcing if it creates a line of winning_size - 1 tokens that can still be completed,
+        or if it blocks such a line of the opponent. The token of the move must already be on the board.
+        :param i:
+        :param j:
+        :return: true or false
+        """
+        token = self.current_state[i][j]
+        for (di, dj) in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            # every window of winning_size cells along the direction that contains (i, j)
+            for start in range(-self.winning_size + 1, 1):
+                own = 0
+                other = 0
+                for k in range(start, start + self.winning_size):
+                    x = i + k * di
+                    y = j + k * dj
+                    if not self.valid_coord(x, y) or self.current_state[x][y] == 'x':
+                        break
+                    cell = self.current_state[x][y]
+                    if cell == token:
+                        own += 1
+                    elif cell != '.':
+                        other += 1
+                else:
+                    if other == 0 and own >= self.winning_size - 1:
+                        return True
+                    if own == 1 and other == self.winning_size - 1:
+                        return True
+        return False
+
+    def count_search(self, name):
+        """
+        Increments a selective search counter of the current move
+        :param name:
+        :return:
+        """
+        self.search_counts[name] = self.search_counts.get(name, 0) + 1
+
     def e(self):
         start = time.time()
 
@@ -512,13 +942,14 @@ class LineEmUp:
 
         return score + count_b
 
-    def e2(self, current_depth):
+    def e2(self, current_depth, timed=True):
         """
         More complicated heuristic which will check all winning situations for W and B
         and return the difference in terms of O (i.e. B - W).
         The current depth is required to determine how close the winning or losing situation is
         (i.e., a loss in current turn should be prioritized over a loss in three turns)
         :param current_depth:
+        :param timed: add the evaluation time to heuristic_times (not for futility estimates)
         :return:    - +101 if Black wins
                     - -101 if Black loses
                     - 0 if a tie
@@ -526,17 +957,32 @@ class LineEmUp:
         """
 
         start = time.time()
-        winning_w = 0
-        winning_b = 0
 
         # check obvious scores (i.e. if there's a winner or a tie)
-        if self.is_end() == 'W':
+        end = self.is_end()
+        if end == 'W':
             return -100 * (1 / (current_depth + 1))
-        if self.is_end() == 'B':
+        if end == 'B':
             return 100 * (1 / (current_depth + 1))
-        if self.is_end() == '.':
+        if end == '.':
             return 0
 
+        # scenarios B is winning minus scenarios W is winning, with the kernel compiled for the configuration
+        score = self.e2_kernel(self.current_state)
+
+        if timed:
+            self.heuristic_times.append(time.time() - start)
+
+        return score
+
+    def scan_windows(self):
+        """
+        Generic version of the E2 score, scanning the whole board; the compiled kernel must agree with it.
+        :return: winning situations for Black minus winning situations for White
+        """
+        winning_w = 0
+        winning_b = 0
+
         # calculate score otherwise (i.e. scenarios B is winning minus scenarios W is winning)
         for i in range(0, self.board_size):
             for j in range(0, self.board_size):
@@ -645,9 +1091,135 @@ class LineEmUp:
                         winning_w += 1
                         winning_b += 1
 
+        return winning_b - winning_w
+
+    def evaluate(self, current_depth):
+        """
+        Evaluates the current state with the turn player's heuristic
+        :param current_depth:
+        :return: the heuristic value of the current state
+        """
+        if self.heuristic == self.E1:
+            return self.e()
+        elif self.heuristic == self.E3:
+            return self.e3(current_depth)
+        else:
+            return self.e2(current_depth)
+
+    def get_windows(self):
+        """
+        Lists every line of winning_size cells (horizontal, vertical and both diagonals) that does not
+        contain a block, as flat cell indices (i * board_size + j). Blocked lines can never be won, so E3 skips them.
+        Cached per (board size, winning size, blocks) so that repeated games reuse them.
+        :return: tuple of windows
+        """
+        blocks = frozenset((coord[0], coord[1]) for coord in self.blocks_coord)
+        key = (self.board_size, self.winning_size, blocks)
+        if key in LineEmUp.pattern_windows:
+            return LineEmUp.pattern_windows[key]
+
+        windows = []
+        for i in range(0, self.board_size):
+            for j in range(0, self.board_size):
+                for (di, dj) in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    cells = [(i + k * di, j + k * dj) for k in range(0, self.winning_size)]
+                    if not all(self.valid_coord(x, y) for (x, y) in cells):
+                        continue
+                    if any((x, y) in blocks for (x, y) in cells):
+                        continue
+                    windows.append(tuple(x * self.board_size + y for (x, y) in cells))
+
+        LineEmUp.pattern_windows[key] = tuple(windows)
+        return LineEmUp.pattern_windows[key]
+
+    def get_kernels(self):
+        """
+        Compiles is_end() and E2 kernels specialized for the board size, winning size and blocks of the game
+        (see KernelCompiler). Cached per (board size, winning size, blocks) so that repeated games reuse them.
+        :return: (is_end kernel, e2 kernel)
+        """
+        blocks = frozenset((coord[0], coord[1]) for coord in self.blocks_coord)
+        key = (self.board_size, self.winning_size, blocks)
+        if key not in LineEmUp.kernels:
+            compiler = KernelCompiler(self.board_size, self.winning_size, blocks, self.windows)
+            LineEmUp.kernels[key] = compiler.compile()
+        return LineEmUp.kernels[key]
+
+    @staticmethod
+    def get_pattern_table(winning_size):
+        """
+        Builds (once per winning size) the E3 score of every window content.
+        A window is encoded in base 3 ('.' = 0, 'W' = 1, 'B' = 2, first cell most significant).
+        A window holding only k tokens of one color scores 4^(k-1) for Black or -4^(k-1) for White,
+        so open twos, threes, fours... weigh progressively more. Windows holding both colors score 0.
+        :param winning_size:
+        :return: list indexed by window code
+        """
+        if winning_size in LineEmUp.pattern_tables:
+            return LineEmUp.pattern_tables[winning_size]
+
+        table = []
+        for code in range(0, 3 ** winning_size):
+            count_w = 0
+            count_b = 0
+            digits = code
+            for k in range(0, winning_size):
+                if digits % 3 == 1:
+                    count_w += 1
+                elif digits % 3 == 2:
+                    count_b += 1
+                digits //= 3
+
+            if count_w and count_b:
+                table.append(0)
+            elif count_b:
+                table.append(4 ** (count_b - 1))
+            elif count_w:
+                table.append(-4 ** (count_w - 1))
+            else:
+                table.append(0)
+
+        LineEmUp.pattern_tables[winning_size] = table
+        return table
+
+    def e3(self, current_depth):
+        """
+        Table driven heuristic: sums the precomputed pattern score (see get_pattern_table()) of every unblocked window.
+        The sum is scaled to (-1, 1) so that any win found by the search outweighs it.
+        :param current_depth:
+        :return:    - 100 / (current_depth + 1) if Black wins, the negation if White wins
+                    - 0 if a tie
+                    - otherwise, the scaled pattern score (positive favours Black)
+        """
+        start = time.time()
+        # blocks never appear in a window, their digit only has to differ from an empty cell's
+        digit = {'.': 0, 'W': 1, 'B': 2, 'x': 3}
+        cells = [digit[cell] for row in self.current_state for cell in row]
+        table = self.pattern_table
+        win_w = (3 ** self.winning_size - 1) // 2
+        win_b = 2 * win_w
+
+        score = 0
+        for window in self.windows:
+            code = 0
+            for index in window:
+                code = code * 3 + cells[index]
+
+            if code == win_w:
+                self.heuristic_times.append(time.time() - start)
+                return -100 * (1 / (current_depth + 1))
+            if code == win_b:
+                self.heuristic_times.append(time.time() - start)
+                return 100 * (1 / (current_depth + 1))
+            score += table[code]
+
         self.heuristic_times.append(time.time() - start)
 
-        return winning_b - winning_w
+        # full board without a winner is a tie
+        if 0 not in cells:
+            return 0
+
+        return score / (len(self.windows) * 4 ** (self.winning_size - 1) + 1)
 
     def printInitialGame(self, printer):
         """
@@ -679,14 +1251,8 @@ class LineEmUp:
         else:
             printer.write("Algo for Black: MINIMAX" + '\n')
 
-        if (self.heuristic_w == self.E1):
-            printer.write("Player White heuristic: E1" + '\n')
-        else:
-            printer.write("Player White heuristic: E2" + '\n')
-        if (self.heuristic_b == self.E1):
-            printer.write("Player Black heuristic: E1" + '\n')
-        else:
-            printer.write("Player Black heuristic: E2" + '\n')
+        printer.write("Player White heuristic: " + self.HEURISTIC_NAMES[self.heuristic_w] + '\n')
+        printer.write("Player Black heuristic: " + self.HEURISTIC_NAMES[self.heuristic_b] + '\n')
 
     def printIntialGameToFile(self, file):
         file.write("n: " + str(self.board_size) + '\n')
@@ -713,77 +1279,243 @@ class LineEmUp:
         else:
             file.write("Algo for Black: MINIMAX" + '\n')
 
-        if (self.heuristic_w == self.E1):
-            file.write("Player White heuristic: E1" + '\n')
-        else:
-            file.write("Player White heuristic: E2" + '\n')
-        if (self.heuristic_b == self.E1):
-            file.write("Player Black heuristic: E1" + '\n')
-        else:
-            file.write("Player Black heuristic: E2" + '\n')
+        file.write("Player White heuristic: " + self.HEURISTIC_NAMES[self.heuristic_w] + '\n')
+        file.write("Player Black heuristic: " + self.HEURISTIC_NAMES[self.heuristic_b] + '\n')
 
     def getStats(self):
         """
         :return: a tuple of all the stats
         """
         if self.result == 'W':
-            if (self.heuristic_w == self.E1):
-                winning_heuristic = 'e1'
-            else:
-                winning_heuristic = 'e2'
-
+            winning_heuristic = self.HEURISTIC_NAMES[self.heuristic_w].lower()
         elif self.result == 'B':
-            if (self.heuristic_b == self.E1):
-                winning_heuristic = 'e1'
-            else:
-                winning_heuristic = 'e2'
+            winning_heuristic = self.HEURISTIC_NAMES[self.heuristic_b].lower()
         else:
             winning_heuristic ='.'
             
-        return (sum(self.total_heuristic_times) / len(self.total_heuristic_times),
-                self.total_state_counts, sum(self.depth_averages) / len(self.depth_averages),
+        return (self.average(self.total_heuristic_times),
+                self.total_state_counts, self.average(self.depth_averages),
                 self.total_state_counts_p_depth,
-                sum(self.ard_averages) / len(self.ard_averages), self.move_counter,
-                self.result,winning_heuristic)
+                self.average(self.ard_averages), self.move_counter,
+                self.result,winning_heuristic, self.total_search_counts)
 
-    def play(self):
+    @staticmethod
+    def average(values):
         """
-        Loops through the game until it is over
+        :return: the average of values, or 0 if there are none (e.g. every move was proven by proof-number search)
+        """
+        if not values:
+            return 0
+        return 1.0 * sum(values) / len(values)
+
+    def getMoveStats(self):
+        """
+        :return: per move lists of (evaluation times, states evaluated, average depths) for the last game
+        """
+        return self.move_times, self.move_state_counts, self.depth_averages
+
+    def resume_root(self, moves):
+        """
+        Starts recording the root moves of a search, or restores them from the checkpoint the game was resumed
+        from; in that case the completed root moves are in root_results and must not be searched again.
+        :param moves: root moves in search order
+        :return: root moves left to search
+        """
+        if self.resume_move is None:
+            self.root_moves = moves
+            self.root_results = []
+            return moves
+        self.root_moves = self.resume_move['root_moves']
+        self.root_results = list(self.resume_move['root_results'])
+        random.setstate(self.resume_move['random'])
+        self.resume_move = None
+        completed = {(i, j) for (i, j, v) in self.root_results}
+        return [move for move in self.root_moves if move not in completed]
+
+    def checkpoint_key(self):
+        """
+        :return: parameters a checkpoint must have been taken with to be resumed by this game, i.e. every
+                 parameter that changes how the game is searched
+        """
+        table_slots = self.transposition_table.slots if self.transposition_table is not None else None
+        return (self.board_size, self.winning_size, sorted(tuple(coord) for coord in self.blocks_coord),
+                self.d1, self.d2, self.a1, self.a2, self.heuristic_w, self.heuristic_b, self.max_move_time,
+                self.lmr, self.lmr_min_moves, self.lmr_reduction, self.futility, self.futility_margin, table_slots,
+                self.pns, self.pns_nodes, self.pns_time)
+
+    def snapshot(self):
+        """
+        Picklable state of the game: board, move history, accumulated stats, the random generator, the
+        transposition table and, during a search, the root moves with their completed results and the
+        counters of the move. Searches only snapshot between root moves, so the board holds no search move.
+        :return: dict
+        """
+        snapshot = {
+            'key': self.checkpoint_key(),
+            'position': self.get_position().to_text(),
+            'history': list(self.history),
+            'stats': {
+                'move_counter': self.move_counter,
+                'total_heuristic_times': self.total_heuristic_times,
+                'total_state_counts': self.total_state_counts,
+                'total_state_counts_p_depth': self.total_state_counts_p_depth,
+                'depth_averages': self.depth_averages,
+                'ard_averages': self.ard_averages,
+                'move_times': self.move_times,
+                'move_state_counts': self.move_state_counts,
+                'total_search_counts': self.total_search_counts,
+                'telemetry': self.telemetry.to_dict() if self.telemetry is not None else None,
+            },
+            'move': None,
+            'random': random.getstate(),
+            'trace': self.trace_offset,
+            'table': self.transposition_table.dump() if self.transposition_table is not None else None,
+        }
+        if self.root_moves is not None:
+            snapshot['move'] = {
+                'elapsed': time.time() - self.move_start,
+                'root_moves': self.root_moves,
+                'root_results': list(self.root_results),
+                'heuristic_times': self.heuristic_times,
+                'state_count': self.state_count,
+                'state_count_p_depth': self.state_count_p_depth,
+                'depths': self.depths,
+                'ard_per_move': self.ard_per_move,
+                'search_counts': self.search_counts,
+                # the random generator as the remaining root moves found it, i.e. after the root shuffles
+                'random': snapshot['random'],
+            }
+        return snapshot
+
+    def restore(self, snapshot):
+        """
+        Restores a snapshot taken by snapshot(); a search that was interrupted resumes after its last
+        completed root move.
+        :param snapshot:
+        :return:
+        """
+        self.set_position(snapshot['position'])
+        self.history = list(snapshot['history'])
+        for name, value in snapshot['stats'].items():
+            if name == 'telemetry':
+                self.telemetry = SearchTelemetry.from_dict(value) if value is not None else None
+            else:
+                setattr(self, name, value)
+        move = snapshot['move']
+        if move is not None:
+            self.heuristic_times = move['heuristic_times']
+            self.state_count = move['state_count']
+            self.state_count_p_depth = move['state_count_p_depth']
+            self.depths = move['depths']
+            self.ard_per_move = move['ard_per_move']
+            self.search_counts = move['search_counts']
+        self.resume_move = move
+        self.resume_trace = snapshot['trace']
+        random.setstate(snapshot['random'])
+        if snapshot['table'] is not None and self.transposition_table is not None:
+            self.transposition_table.load(snapshot['table'])
+
+    def save_checkpoint(self, force=False):
+        """
+        Snapshots the game into its checkpoint file if one is set and the checkpoint interval has passed
+        :param force: snapshot regardless of the interval
         :return:
         """
-        printer = PrintManager()
-        printer.setPath(F'gameTrace-{self.board_size}{self.blocks}{self.winning_size}{self.max_move_time}.txt')
+        if self.checkpoint is not None and (force or self.checkpoint.due()):
+            self.checkpoint.save(self.snapshot())
 
-        self.printInitialGame(printer)
+    def prove_win(self):
+        """
+        Runs a proof-number search from the current state for the turn player.
+        Proof and disproof counts and the nodes used are added to the search counts of the move.
+        :return: (value, x, y) of the proving move if a win is proven, None otherwise
+        """
+        if self.pns_time is None:
+            pns_time = self.max_move_time / 2.0
+        else:
+            pns_time = self.pns_time
+        search = ProofNumberSearch(self, self.pns_nodes, pns_time, self.controller)
+        (result, move) = search.search()
+
+        self.count_search('pns_runs')
+        self.search_counts['pns_nodes'] = self.search_counts.get('pns_nodes', 0) + search.nodes
+        self.search_counts['pns_proofs'] = self.search_counts.get('pns_proofs', 0) + search.proofs
+        self.search_counts['pns_disproofs'] = self.search_counts.get('pns_disproofs', 0) + search.disproofs
+        if result == ProofNumberSearch.PROVEN_LOSS:
+            self.count_search('pns_proven_losses')
+
+        if result != ProofNumberSearch.PROVEN_WIN:
+            return None
+        self.count_search('pns_proven_wins')
+        value = 100 if self.player_turn == 'B' else -100
+        return value, move[0], move[1]
+
+    def play(self, position=None):
+        """
+        Loops through the game until it is over
+        :param position: optional Position (or its integer or text encoding) to start from instead of an empty board
+        :return:
+        """
+        # stats are per game, so start from a clean slate every time play() is called
+        self.initialize_game()
+        if position is not None:
+            self.set_position(position)
+
+        # resume from the checkpoint of an interrupted game with the same parameters, if any
+        if self.checkpoint is not None:
+            snapshot = self.checkpoint.load()
+            if snapshot is not None and snapshot['key'] == self.checkpoint_key():
+                self.restore(snapshot)
+
+        printer = PrintManager(echo=self.console_echo())
+        trace = F'gameTrace-{self.board_size}{self.blocks}{self.winning_size}{self.max_move_time}.txt'
+        if self.resume_trace is not None and os.path.exists(trace) and os.path.getsize(trace) >= self.resume_trace:
+            # continue the trace of the interrupted game, dropping what was written after the checkpoint
+            printer.setPath(trace, self.resume_trace)
+        else:
+            printer.setPath(trace)
+            self.printInitialGame(printer)
+        self.trace_offset = printer.tell()
 
         while True:
             self.draw_board(printer)
             if self.check_end():
                 printer.write('i. Average evaluation time of heuristic: ' + str(
-                    1.0 * sum(self.total_heuristic_times) / len(self.total_heuristic_times)) + '\n')
+                    self.average(self.total_heuristic_times)) + '\n')
                 printer.write('ii. Total states evaluated: ' + str(self.total_state_counts) + '\n')
-                printer.write('iii. Average of average depths: ' + str(
-                    sum(self.depth_averages) / len(self.depth_averages)) + '\n')
+                printer.write('iii. Average of average depths: ' + str(self.average(self.depth_averages)) + '\n')
                 printer.write('iv. Total number of states evaluated at each depth: \n')
                 for depth in sorted(self.total_state_counts_p_depth.keys(), reverse=True):
                     printer.write("\t" + str(depth) + ": " + str(self.total_state_counts_p_depth[depth]) + '\n')
-                printer.write('v. Average ARD: ' + str(sum(self.ard_averages) / len(self.ard_averages)) + '\n')
+                printer.write('v. Average ARD: ' + str(self.average(self.ard_averages)) + '\n')
                 printer.write('vi. Total Move Count: ' + str(self.move_counter) + '\n')
+                if self.total_search_counts:
+                    printer.write('vii. Total selective search counts: ' + ', '.join(
+                        F'{name}: {count}' for name, count in sorted(self.total_search_counts.items())) + '\n')
+                if self.telemetry is not None:
+                    self.telemetry.write(printer)
+                if self.checkpoint is not None:
+                    self.checkpoint.clear()
                 return
 
             self.move_start = time.time()
+            if self.resume_move is not None:
+                self.move_start -= self.resume_move['elapsed']
 
-            if self.algo == self.MINIMAX:
-                if self.player_turn == 'W':
-                    (v, x, y) = self.minimax(max_turn=False)
-                else:
-                    (v, x, y) = self.minimax(max_turn=True)
+            proven = None
+            cancelled = False
+            if self.pns and self.resume_move is None:
+                proven = self.prove_win()
+                cancelled = self.controller.stopped == SearchController.CANCELLED
 
-            else:  # algo == self.ALPHABETA
-                if self.player_turn == 'W':
-                    (v, x, y) = self.alphabeta(max_turn=False)
-                else:
-                    (v, x, y) = self.alphabeta(max_turn=True)
+            if proven is not None:
+                (v, x, y) = proven
+
+            else:
+                # a move cancelled during its proof-number search is not searched again
+                if not cancelled:
+                    self.controller.start(self.max_move_time - (time.time() - self.move_start))
+                (v, x, y) = self.search(self.player_turn == 'B')
             end = time.time()
 
             eval_time = round(end - self.move_start, 7)
@@ -796,17 +1528,19 @@ class LineEmUp:
             printer.write("iii. Number of states evaluated per depth:\n")
             for depth in sorted(self.state_count_p_depth.keys(), reverse=True):
                 printer.write("\t" + str(depth) + ": " + str(self.state_count_p_depth[depth]) + '\n')
-            printer.write("iv. Average depths of heuristic evaluation: " + str(
-                (1.0 * sum(self.depths) / len(self.depths))) + '\n')
-            printer.write("v. ARD: " + str(self.ard_per_move[0]) + '\n')
+            printer.write("iv. Average depths of heuristic evaluation: " + str(self.average(self.depths)) + '\n')
+            printer.write("v. ARD: " + str(self.ard_per_move[0] if self.ard_per_move else 0) + '\n')
+            if self.search_counts:
+                printer.write("vi. Selective search: " + ', '.join(
+                    F'{name}: {count}' for name, count in sorted(self.search_counts.items())) + '\n')
 
             if (self.player_turn == 'W' and self.player_w == self.HUMAN) or (
                     self.player_turn == 'B' and self.player_b == self.HUMAN):
                 if self.recommend:
                     print(F'Recommended move: x = {x}, y = {y}') + '\n'
                 (x, y) = self.input_move()
-            elif (self.player_turn == 'W' and self.player_w == self.AI) or (
-                    self.player_turn == 'B' and self.player_b == self.AI):
+            elif self.console_echo() and ((self.player_turn == 'W' and self.player_w == self.AI) or (
+                    self.player_turn == 'B' and self.player_b == self.AI)):
                 print(F'Player {self.player_turn} under AI control plays: x = {x}, y = {y}' + '\n')
 
             # store stat variables before resetting
@@ -816,18 +1550,32 @@ class LineEmUp:
                 if depth not in self.total_state_counts_p_depth:
                     self.total_state_counts_p_depth[depth] = 0
                 self.total_state_counts_p_depth[depth] += self.state_count_p_depth[depth]
-            self.depth_averages.append(1.0 * sum(self.depths) / len(self.depths))
-            self.ard_averages.append(self.ard_per_move[0])
+            # moves proven by proof-number search evaluate no heuristic, so they have no depth
+            if self.depths:
+                self.depth_averages.append(self.average(self.depths))
+                self.ard_averages.append(self.ard_per_move[0])
+            for name in self.search_counts:
+                self.total_search_counts[name] = self.total_search_counts.get(name, 0) + self.search_counts[name]
+            self.move_times.append(eval_time)
+            self.move_state_counts.append(self.state_count)
+            if self.progress is not None:
+                self.progress.move(self.state_count)
+            if self.telemetry is not None and self.algo == self.ALPHABETA and self.controller.stopped is None:
+                self.telemetry.move(self.state_count_p_depth.get(1, 0), self.max_depth, len(self.depths))
 
             # reset variables
             self.heuristic_times = []
+            self.search_counts = {}
             self.state_count = 0
             self.state_count_p_depth = {}
             self.depths = []
             self.max_depth_adjusted = self.max_depth
-            self.timer_is_up = False
             self.current_state[x][y] = self.player_turn
+            self.history.append((self.player_turn, x, y))
             self.ard_per_move = []
+            self.root_moves = None
+            self.root_results = []
+            self.resume_move = None
             self.switch_player()
-
-        self.initialize_game()
+            self.trace_offset = printer.tell()
+            self.save_checkpoint()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+
+class Position:
+    """
+    Compact, hashable LineEmUp position: board size, winning size, the tokens on every cell (blocks included)
+    and the player to move.
+
+    Two encodings are available and both round-trip in O(n^2):
+        - an integer: 2 bits per cell ('.' = 0, 'W' = 1, 'B' = 2, 'x' = 3, first cell most significant),
+          then 1 bit for the turn (1 = Black), 8 bits for the winning size and 8 bits for the board size
+        - a short text: "<n>:<s>:<turn>:<rows>", rows separated by '/' and runs of empty cells written as
+          their length, e.g. "4:3:W:x2x/4/2W1/x2x"
+
+    Positions compare and hash by their integer encoding, so they can be used directly as keys of caches and
+    result stores.
+    """
+
+    TOKENS = '.WBx'
+
+    def __init__(self, board_size, winning_size, cells, turn='W'):
+        """
+        :param board_size:
+        :param winning_size:
+        :param cells: board_size rows of board_size tokens among '.', 'W', 'B' and 'x'
+        :param turn: player to move, 'W' or 'B'
+        """
+        if len(cells) != board_size or any(len(row) != board_size for row in cells):
+            raise ValueError("Cells do not correspond to a " + str(board_size) + "x" + str(board_size) + " board.")
+        if any(cell not in self.TOKENS for row in cells for cell in row):
+            raise ValueError("Cells must be one of '.', 'W', 'B' or 'x'.")
+        if turn not in ('W', 'B'):
+            raise ValueError("Turn must be 'W' or 'B'.")
+        if not 0 < board_size < 256 or not 0 < winning_size < 256:
+            raise ValueError("Board and winning sizes must be between 1 and 255.")
+        self.board_size = board_size
+        self.winning_size = winning_size
+        self.cells = tuple(''.join(row) for row in cells)
+        self.turn = turn
+        self.code = None
+
+    @property
+    def blocks(self):
+        """
+        :return: coordinates of the blocks
+        """
+        return [(x, y) for x in range(0, self.board_size) for y in range(0, self.board_size)
+                if self.cells[x][y] == 'x']
+
+    def to_int(self):
+        if self.code is None:
+            code = 0
+            for row in self.cells:
+                for cell in row:
+                    code = (code << 2) | self.TOKENS.index(cell)
+            code = (code << 1) | (self.turn == 'B')
+            self.code = (((code << 8) | self.winning_size) << 8) | self.board_size
+        return self.code
+
+    @classmethod
+    def from_int(cls, code):
+        board_size = code & 0xFF
+        winning_size = (code >> 8) & 0xFF
+        code >>= 16
+        turn = 'B' if code & 1 else 'W'
+        code >>= 1
+
+        tokens = []
+        for k in range(0, board_size * board_size):
+            tokens.append(cls.TOKENS[code & 3])
+            code >>= 2
+        tokens.reverse()
+        cells = [''.join(tokens[r * board_size:(r + 1) * board_size]) for r in range(0, board_size)]
+        return cls(board_size, winning_size, cells, turn)
+
+    def to_text(self):
+        rows = []
+        for row in self.cells:
+            text = ''
+            empty = 0
+            for cell in row:
+                if cell == '.':
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += cell
+            if empty:
+                text += str(empty)
+            rows.append(text)
+        return F'{self.board_size}:{self.winning_size}:{self.turn}:' + '/'.join(rows)
+
+    @classmethod
+    def from_text(cls, text):
+        board_size, winning_size, turn, rows = text.strip().split(':')
+        cells = []
+        for row in rows.split('/'):
+            cell = ''
+            empty = ''
+            for char in row:
+                if char.isdigit():
+                    empty += char
+                    continue
+                if empty:
+                    cell += '.' * int(empty)
+                    empty = ''
+                cell += char
+            if empty:
+                cell += '.' * int(empty)
+            cells.append(cell)
+        return cls(int(board_size), int(winning_size), cells, turn)
+
+    def __eq__(self, other):
+        return isinstance(other, Position) and self.to_int() == other.to_int()
+
+    def __hash__(self):
+        return hash(self.to_int())
+
+    def __str__(self):
+        return self.to_text()
+
+    def __repr__(self):
+        return F"Position.from_text('{self.to_text()}')"
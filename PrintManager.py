@@ -9,19 +9,35 @@ class PrintManager(object):
     Utility class so that system's prints are outputted to both the console and a designated filepath
     """
 
-    def __init__(self):
-        self.terminal = sys.stdout
+    def __init__(self, echo=True):
+        """
+        :param echo: also print to the console, otherwise only write to the file
+        """
+        self.terminal = sys.stdout if echo else None
         self.log = open('log.log', "w")
 
     def write(self, message):
-        self.terminal.write(message)
+        if self.terminal is not None:
+            self.terminal.write(message)
         self.log.write(message)
 
     """ Custom method to update the path of the file being written to """
 
-    def setPath(self, path):
+    def setPath(self, path, offset=None):
         self.log.close()
-        self.log = open(path, "w")
+        if offset is None:
+            self.log = open(path, "w")
+        else:
+            # resuming: keep the first offset characters written to the file and continue after them
+            self.log = open(path, "r+")
+            self.log.truncate(offset)
+            self.log.seek(offset)
+
+    """ Custom method returning how much has been written to the file, once it is all on disk """
+
+    def tell(self):
+        self.log.flush()
+        return self.log.tell()
 
     def flush(self):
         pass
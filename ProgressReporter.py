@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import json
+import os
+import sys
+import time
+
+
+class ProgressReporter:
+    """
+    Reports the progress of the games of one config while they are played: games completed, moves/s,
+    states (nodes)/s, the running win tally and an estimated time to finish.
+
+    Reports are rate limited to one every interval seconds. Each one rewrites a single status line on stream
+    and/or replaces a JSON status file, so a long run can be monitored without game traces.
+
+    LineEmUp calls move() after every move when its progress attribute is set, and then only writes its game
+    trace to file, since its console output would garble the status line; game() is called with the record of
+    every completed game (see ScoreBoard.gameRecord()).
+    """
+
+    def __init__(self, total_games, label='', interval=1.0, stream=sys.stderr, status_file=None):
+        """
+        :param total_games: number of games to be played for the config
+        :param label: name of the config shown in reports
+        :param interval: minimum number of seconds between two reports
+        :param stream: file the status line is written to, or None
+        :param status_file: path of the JSON status file, or None
+        """
+        self.total_games = total_games
+        self.label = label
+        self.interval = interval
+        self.stream = stream
+        self.status_file = status_file
+
+        self.start = time.time()
+        self.last_report = None
+        self.games = 0
+        self.moves = 0
+        self.states = 0
+        self.wins = {}
+        # moves and states of the game in progress, replaced by the game record once it completes
+        self.game_moves = 0
+        self.game_states = 0
+
+    def move(self, states):
+        """
+        Records a move of the game in progress
+        :param states: number of states evaluated for the move
+        :return:
+        """
+        self.game_moves += 1
+        self.game_states += states
+        self.report()
+
+    def game(self, record):
+        """
+        Records a completed game
+        :param record: game record (see ScoreBoard.gameRecord())
+        :return:
+        """
+        self.games += 1
+        self.moves += record['move_count']
+        self.states += record['state_count']
+        # ties are recorded as '.'
+        winner = record['winning_heuristic']
+        if winner == '.':
+            winner = 'draw'
+        self.wins[winner] = self.wins.get(winner, 0) + 1
+        self.game_moves = 0
+        self.game_states = 0
+        self.report()
+
+    def status(self):
+        """
+        :return: JSON-serializable snapshot of the progress
+        """
+        elapsed = time.time() - self.start
+        moves = self.moves + self.game_moves
+        states = self.states + self.game_states
+        eta = None
+        if self.games:
+            eta = elapsed / self.games * (self.total_games - self.games)
+        return {
+            'config': self.label,
+            'games': self.games,
+            'total_games': self.total_games,
+            'elapsed': elapsed,
+            'moves': moves,
+            'states': states,
+            'moves_per_second': moves / elapsed if elapsed > 0 else 0,
+            'states_per_second': states / elapsed if elapsed > 0 else 0,
+            'wins': dict(self.wins),
+            'eta': eta,
+            'updated': time.time(),
+        }
+
+    @staticmethod
+    def duration(seconds):
+        if seconds is None:
+            return '?'
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        if hours:
+            return F'{hours}h{minutes:02d}m'
+        return F'{minutes}m{seconds:02d}s'
+
+    def line(self, status):
+        wins = ' '.join(F'{name}: {count}' for name, count in sorted(status['wins'].items()))
+        return (F"[{status['config']}] games {status['games']}/{status['total_games']} | "
+                F"{status['moves_per_second']:.1f} moves/s | {status['states_per_second']:.0f} states/s | "
+                F"{wins or 'no results'} | ETA {self.duration(status['eta'])}")
+
+    def report(self, force=False):
+        """
+        Writes the status line and status file, unless the last report is less than interval seconds old
+        :param force: report regardless of the interval
+        :return:
+        """
+        now = time.time()
+        if not force and self.last_report is not None and now - self.last_report < self.interval:
+            return
+        self.last_report = now
+        status = self.status()
+
+        if self.stream is not None:
+            self.stream.write('\r' + self.line(status) + '\033[K')
+            self.stream.flush()
+        if self.status_file is not None:
+            temporary = self.status_file + '.tmp'
+            with open(temporary, 'w') as file:
+                json.dump(status, file, indent=4)
+            os.replace(temporary, self.status_file)
+
+    def finish(self):
+        """
+        Writes the final report and ends the status line
+        :return:
+        """
+        self.report(force=True)
+        if self.stream is not None:
+            self.stream.write('\n')
+            self.stream.flush()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import argparse
+from SearchController import SearchController
+
+
+class ProofNode:
+    """
+    Node of the proof-number search tree. OR nodes are those where the attacker is to move.
+    """
+    __slots__ = ('move', 'parent', 'children', 'proof', 'disproof', 'is_or')
+
+    def __init__(self, move, parent, is_or):
+        self.move = move
+        self.parent = parent
+        self.children = None
+        self.proof = 1
+        self.disproof = 1
+        self.is_or = is_or
+
+
+class ProofNumberSearch:
+    """
+    Proof-number search on a LineEmUp position, within a node and time budget.
+    Unlike alphabeta() it has no depth limit, so it can prove forced wins made of long chains of threats.
+
+    search() returns one of:
+        PROVEN_WIN - the player to move wins whatever the opponent does (the proving move is returned)
+        PROVEN_LOSS - the opponent wins whatever the player to move does
+        UNKNOWN - neither could be proven within the budget (or the position is a draw)
+
+    Attributes:
+        nodes - nodes created by the last search()
+        proofs, disproofs - number of proofs and disproofs of a win found by the last search()
+    """
+
+    PROVEN_WIN = 'win'
+    PROVEN_LOSS = 'loss'
+    UNKNOWN = 'unknown'
+    INFINITY = 10 ** 9
+
+    def __init__(self, game, max_nodes=20000, max_time=1.0, controller=None):
+        """
+        :param game: LineEmUp whose current state and turn player are searched (the game is not modified)
+        :param max_nodes: maximum number of tree nodes created per search()
+        :param max_time: maximum time in seconds per search()
+        :param controller: SearchController enforcing max_time and cancellation (a new one by default)
+        """
+        self.board_size = game.board_size
+        self.winning_size = game.winning_size
+        self.board = [row[:] for row in game.current_state]
+        self.turn = game.player_turn
+        self.max_nodes = max_nodes
+        self.max_time = max_time
+        self.controller = controller if controller is not None else SearchController()
+        self.nodes = 0
+        self.proofs = 0
+        self.disproofs = 0
+
+    @staticmethod
+    def other(token):
+        return 'B' if token == 'W' else 'W'
+
+    def wins_at(self, x, y, token):
+        """
+        Checks if the token just played at (x, y) completes a line of winning_size
+        :return: true or false
+        """
+        for (dx, dy) in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            streak = 1
+            for sign in (1, -1):
+                i = x + sign * dx
+                j = y + sign * dy
+                while 0 <= i < self.board_size and 0 <= j < self.board_size and self.board[i][j] == token:
+                    streak += 1
+                    i += sign * dx
+                    j += sign * dy
+            if streak >= self.winning_size:
+                return True
+        return False
+
+    def expand(self, node, token, attacker):
+        """
+        Creates the children of node, where token is to move, and scores the terminal ones
+        :return:
+        """
+        node.children = []
+        empty = [(x, y) for x in range(0, self.board_size) for y in range(0, self.board_size)
+                 if self.board[x][y] == '.']
+        for (x, y) in empty:
+            child = ProofNode((x, y), node, not node.is_or)
+            self.board[x][y] = token
+            if self.wins_at(x, y, token):
+                if token == attacker:
+                    child.proof, child.disproof = 0, self.INFINITY
+                else:
+                    child.proof, child.disproof = self.INFINITY, 0
+            elif len(empty) == 1:
+                # a full board without a winner is a draw, i.e. not a win for the attacker
+                child.proof, child.disproof = self.INFINITY, 0
+            self.board[x][y] = '.'
+            node.children.append(child)
+        self.nodes += len(node.children)
+
+    def update(self, node):
+        """
+        Recomputes the proof and disproof numbers of an expanded node from its children
+        """
+        if node.is_or:
+            node.proof = min(child.proof for child in node.children)
+            node.disproof = min(self.INFINITY, sum(child.disproof for child in node.children))
+        else:
+            node.proof = min(self.INFINITY, sum(child.proof for child in node.children))
+            node.disproof = min(child.disproof for child in node.children)
+
+    def prove(self, attacker):
+        """
+        Tries to prove that attacker wins from the current board, with self.turn to move,
+        until the node budget is spent or the controller stops the search.
+        :param attacker: 'W' or 'B'
+        :return: the root node
+        """
+        root = ProofNode(None, None, self.turn == attacker)
+        while root.proof != 0 and root.disproof != 0 and self.nodes < self.max_nodes:
+            if self.controller.expired():
+                break
+
+            # descend to the most proving node, playing its moves on the board
+            node = root
+            token = self.turn
+            path = []
+            while node.children is not None:
+                if node.is_or:
+                    node = min(node.children, key=lambda child: child.proof)
+                else:
+                    node = min(node.children, key=lambda child: child.disproof)
+                self.board[node.move[0]][node.move[1]] = token
+                path.append(node.move)
+                token = self.other(token)
+
+            self.expand(node, token, attacker)
+
+            # back the new numbers up to the root and undo the moves
+            while node is not None:
+                self.update(node)
+                node = node.parent
+            for (x, y) in path:
+                self.board[x][y] = '.'
+
+        if root.proof == 0:
+            self.proofs += 1
+        elif root.disproof == 0:
+            self.disproofs += 1
+        return root
+
+    def search(self):
+        """
+        Tries to prove a win for the player to move, then a win for the opponent, within the budget.
+        :return: (PROVEN_WIN, PROVEN_LOSS or UNKNOWN, proving move (x, y) or None)
+        """
+        self.controller.start(self.max_time)
+        self.nodes = 0
+
+        root = self.prove(self.turn)
+        if root.proof == 0:
+            move = next(child.move for child in root.children if child.proof == 0)
+            return self.PROVEN_WIN, move
+
+        if root.disproof == 0:
+            root = self.prove(self.other(self.turn))
+            if root.proof == 0:
+                return self.PROVEN_LOSS, None
+
+        return self.UNKNOWN, None
+
+
+def main():
+    from LineEmUp import LineEmUp
+
+    parser = argparse.ArgumentParser(description='Prove a LineEmUp position won or lost with proof-number search.')
+    parser.add_argument('position', help='position in text form, e.g. "4:3:W:x2x/4/2W1/x2x"')
+    parser.add_argument('--nodes', type=int, default=200000)
+    parser.add_argument('--time', type=float, default=10.0)
+    args = parser.parse_args()
+
+    game = LineEmUp()
+    game.set_position(args.position)
+    search = ProofNumberSearch(game, args.nodes, args.time)
+    result, move = search.search()
+    print(F'{result} {move} ({search.nodes} nodes, {search.proofs} proofs, {search.disproofs} disproofs)')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import math
+
+
+class RunningStats:
+    """
+    Streaming accumulator for a single metric (e.g. move time, states per move, depth).
+
+    Keeps count, mean, variance (Welford), min and max, plus a fixed-size log-bucket sketch
+    from which approximate percentiles are read. Memory does not grow with the number of samples,
+    and two accumulators for the same metric can be merged (e.g. results from separate shards).
+
+    Attributes:
+        count - number of samples seen
+        mean - running mean
+        m2 - running sum of squared differences from the mean
+        min, max - smallest and largest sample seen
+        buckets - sketch buckets: bucket index -> number of samples
+        zero_count - number of samples <= 0 (kept outside of the log buckets)
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=512):
+        """
+        :param relative_accuracy: relative error of the percentile estimates
+        :param max_buckets: maximum number of sketch buckets; lowest buckets are collapsed past this size
+        """
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = {}
+        self.zero_count = 0
+
+    def add(self, value):
+        """
+        Adds a single sample.
+        :param value:
+        :return:
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+        if value <= 0:
+            self.zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self.log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+            if len(self.buckets) > self.max_buckets:
+                self.collapse()
+
+    def extend(self, values):
+        for value in values:
+            self.add(value)
+
+    def collapse(self):
+        """
+        Folds the lowest buckets into one so that the sketch stays within max_buckets.
+        Only the accuracy of the lowest percentiles is affected.
+        :return:
+        """
+        indices = sorted(self.buckets.keys())
+        excess = len(indices) - self.max_buckets
+        if excess <= 0:
+            return
+        target = indices[excess]
+        for index in indices[:excess]:
+            self.buckets[target] += self.buckets.pop(index)
+
+    def merge(self, other):
+        """
+        Merges another accumulator of the same metric into this one (Chan et al. parallel variance).
+        :param other: RunningStats with the same relative accuracy
+        :return: self
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracies.")
+        if other.count == 0:
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+
+        self.zero_count += other.zero_count
+        for index, bucket_count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + bucket_count
+        self.collapse()
+
+        return self
+
+    def variance(self):
+        """
+        :return: sample variance, or 0 with fewer than two samples
+        """
+        if self.count < 2:
+            return 0.0
+        return self.m2 / (self.count - 1)
+
+    def stddev(self):
+        return math.sqrt(self.variance())
+
+    def percentile(self, p):
+        """
+        Approximate percentile read from the sketch.
+        :param p: percentile between 0 and 100
+        :return: estimated value, or None if no samples were added
+        """
+        if self.count == 0:
+            return None
+
+        rank = p / 100.0 * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return min(self.min, 0)
+
+        for index in sorted(self.buckets.keys()):
+            seen += self.buckets[index]
+            if rank < seen:
+                estimate = 2 * self.gamma ** index / (self.gamma + 1)
+                # never report outside of the exact observed range
+                return max(self.min, min(self.max, estimate))
+
+        return self.max
+
+    def to_dict(self):
+        """
+        :return: a JSON-serializable summary, including the raw sketch so results can be merged later
+        """
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'variance': self.variance(),
+            'stddev': self.stddev(),
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'sketch': {
+                'relative_accuracy': self.relative_accuracy,
+                'max_buckets': self.max_buckets,
+                'm2': self.m2,
+                'zero_count': self.zero_count,
+                'buckets': {str(index): c for index, c in self.buckets.items()},
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds an accumulator from the output of to_dict()
+        :param data:
+        :return: RunningStats
+        """
+        sketch = data['sketch']
+        stats = cls(sketch['relative_accuracy'], sketch['max_buckets'])
+        stats.count = data['count']
+        stats.mean = data['mean']
+        stats.m2 = sketch['m2']
+        stats.min = data['min']
+        stats.max = data['max']
+        stats.zero_count = sketch['zero_count']
+        stats.buckets = {int(index): c for index, c in sketch['buckets'].items()}
+        return stats
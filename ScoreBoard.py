@@ -1,8 +1,14 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+from Checkpoint import Checkpoint
 from LineEmUp import LineEmUp
+from ProgressReporter import ProgressReporter
+from RunningStats import RunningStats
+from SearchTelemetry import SearchTelemetry
+import json
 import random
+import sys
 
 
 class ScoreBoard:
@@ -18,12 +24,45 @@ class ScoreBoard:
         average_total_state_counts_p_depth
         average_ard_averages
         average_move_counter
+        games_played - number of games recorded for the current config
+        move_stats - streaming statistics per move (move time, states per move, depth) for the current config
+        telemetry - alphabeta search telemetry of the current config, if enabled with "telemetry": true
+        progress - whether calculateScore() reports its progress on a status line
+        status_file - path of a JSON file calculateScore() keeps updated with its progress, or None
+        checkpoint - file calculateScore() snapshots its completed games into, and resumes from, or None;
+                     the game in progress is snapshotted into checkpoint + '.game'
+        checkpoint_interval - minimum number of seconds between two snapshots of the game in progress
 
     * Note that almost all attributes are simply averages of the averages calculated at the end of each game
     """
 
-    def __init__(self, r=10):
+    MOVE_METRICS = ('move_time', 'states_per_move', 'depth')
+    SEARCH_OPTIONS = ('lmr', 'lmr_min_moves', 'lmr_reduction', 'futility', 'futility_margin', 'pns', 'pns_nodes',
+                      'pns_time')
+
+    def __init__(self, r=10, progress=True, status_file=None, checkpoint=None, checkpoint_interval=60.0):
         self.num_of_games_per_symbol = r
+        self.destination = 'scoreboard.txt'
+        self.g = None
+        self.progress = progress
+        self.status_file = status_file
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.reset()
+
+    def reset(self):
+        """
+        Clears all accumulated statistics so that every config starts from zero.
+        :return:
+        """
+        self.total_heuristic_times = 0
+        self.total_state_counts = 0
+        self.total_depth_averages = 0
+        self.total_state_counts_p_depth = {}
+        self.total_ard_averages = 0
+        self.total_move_counter = 0
+        self.games_played = 0
+
         self.average_heuristic_times = 0
         self.average_state_counts = 0
         self.average_depth_averages = 0
@@ -32,19 +71,41 @@ class ScoreBoard:
         self.average_move_counter = 0
         self.winning_e1 = 0
         self.winning_e2 = 0
-        self.destination = 'scoreboard.txt'
+        self.move_stats = {metric: RunningStats() for metric in self.MOVE_METRICS}
+        self.telemetry = None
+        self.total_search_counts = {}
 
-    def calculateScore(self, config):
+    @staticmethod
+    def parseConfig(config, rng=random):
         """
-        Runs 2*r simulations of LineEmUp and calculates all all relevant statistics.
-        :return:
+        Converts an entry of configurations.json into LineEmUp constructor arguments.
+        Entries are either structured (integer keys "n", "b", "s", "d1", "d2" and a number of seconds "t")
+        or use the legacy "conf" string of single digits. "a1"/"a2" select alphabeta (true) or minimax (false), and
+        "blocks" is optional; missing blocks are placed at random using rng.
+        "telemetry": true records alphabeta search telemetry, and the selective search options of LineEmUp
+        ("lmr", "lmr_min_moves", "lmr_reduction", "futility", "futility_margin", "pns", "pns_nodes", "pns_time")
+        are passed through when present.
+        :param config: dict
+        :param rng: random number generator used to place blocks
+        :return: dict of keyword arguments for LineEmUp
         """
-        n = int(config["conf"][0])
-        b = int(config["conf"][1])
-        s = int(config["conf"][2])
-        t = int(config["conf"][3])
-        d1 = int(config["conf"][4])
-        d2 = int(config["conf"][5])
+        if "conf" in config:
+            n = int(config["conf"][0])
+            b = int(config["conf"][1])
+            s = int(config["conf"][2])
+            t = int(config["conf"][3])
+            d1 = int(config["conf"][4])
+            d2 = int(config["conf"][5])
+        else:
+            n = int(config["n"])
+            b = int(config["b"])
+            s = int(config["s"])
+            # t may be fractional; whole values stay ints so trace names and result keys do not change
+            t = float(config["t"])
+            if t.is_integer():
+                t = int(t)
+            d1 = int(config["d1"])
+            d2 = int(config["d2"])
         if config["a1"]:
             a1 = LineEmUp.ALPHABETA
         else:
@@ -57,59 +118,159 @@ class ScoreBoard:
         if "blocks" in config:
             blocks = config["blocks"]
         else:
-            blocks = [(random.randrange(0, n), random.randrange(0, n)) for i in range(b)]
-
-        self.g = LineEmUp(board_size=n, blocks=b, blocks_coord=blocks, winning_size=s, max_move_time=t, recommend=True,
-                          player_w=LineEmUp.AI, player_b=LineEmUp.AI, heuristic_w=LineEmUp.E1,
-                          heuristic_b=LineEmUp.E2, a1=a1, a2=a2, d1=d1, d2=d2)
-        for play in range(0, self.num_of_games_per_symbol):
-            self.g.play()
-            stats = self.g.getStats()
-            self.average_heuristic_times += stats[0]
-            self.average_state_counts += stats[1]
-            self.average_depth_averages += stats[2]
-            for depth in stats[3]:
-                if depth in self.average_total_state_counts_p_depth:
-                    self.average_total_state_counts_p_depth[depth] += stats[3][depth]
-                else:
-                    self.average_total_state_counts_p_depth[depth] = stats[3][depth]
-
-            self.average_ard_averages += stats[4]
-            self.average_move_counter += stats[5]
-
-        self.g = LineEmUp(board_size=n, blocks=b, blocks_coord=blocks, winning_size=s, max_move_time=t, recommend=True,
-                          player_w=LineEmUp.AI, player_b=LineEmUp.AI, heuristic_w=LineEmUp.E2,
-                          heuristic_b=LineEmUp.E1, a1=a1, a2=a2, d1=d1, d2=d2)
-        for play in range(0, self.num_of_games_per_symbol):
-            self.g.play()
-            stats = self.g.getStats()
-            self.average_heuristic_times += stats[0]
-            self.average_state_counts += stats[1]
-            self.average_depth_averages += stats[2]
-            for depth in stats[3]:
-                if depth in self.average_total_state_counts_p_depth:
-                    self.average_total_state_counts_p_depth[depth] += stats[3][depth]
-                else:
-                    self.average_total_state_counts_p_depth[depth] = stats[3][depth]
-            self.average_ard_averages += stats[4]
-            self.average_move_counter += stats[5]
-            if stats[7] == 'e1' :
-                self.winning_e1 += 1
-            elif stats[7] == 'e2':
-                self.winning_e2 += 1
-
-        self.average_heuristic_times = self.average_heuristic_times / (self.num_of_games_per_symbol * 2)
-        self.average_state_counts = self.average_state_counts / (self.num_of_games_per_symbol * 2)
-        self.average_depth_averages = self.average_depth_averages / (self.num_of_games_per_symbol * 2)
-        for depth in stats[3]:
-            self.average_total_state_counts_p_depth[depth] = self.average_total_state_counts_p_depth[depth] / (
-                    self.num_of_games_per_symbol * 2)
-        self.average_ard_averages = self.average_ard_averages / (self.num_of_games_per_symbol * 2)
-        self.average_move_counter = self.average_move_counter / (self.num_of_games_per_symbol * 2)
+            blocks = [(rng.randrange(0, n), rng.randrange(0, n)) for i in range(b)]
+
+        params = dict(board_size=n, blocks=b, blocks_coord=blocks, winning_size=s, max_move_time=t,
+                      recommend=True, player_w=LineEmUp.AI, player_b=LineEmUp.AI, a1=a1, a2=a2, d1=d1, d2=d2,
+                      telemetry=bool(config.get("telemetry", False)))
+        for option in ScoreBoard.SEARCH_OPTIONS:
+            if option in config:
+                params[option] = config[option]
+        return params
+
+    @staticmethod
+    def gameRecord(game):
+        """
+        Compact, JSON-serializable result of the last game played by a LineEmUp instance.
+        :param game: LineEmUp on which play() has completed
+        :return: dict
+        """
+        stats = game.getStats()
+        move_times, move_state_counts, move_depths = game.getMoveStats()
+        return {
+            'heuristic_time': stats[0],
+            'state_count': stats[1],
+            'depth_average': stats[2],
+            'state_counts_p_depth': {str(depth): count for depth, count in stats[3].items()},
+            'ard_average': stats[4],
+            'move_count': stats[5],
+            'result': stats[6],
+            'winning_heuristic': stats[7],
+            'search_counts': dict(stats[8]),
+            'move_times': list(move_times),
+            'move_state_counts': list(move_state_counts),
+            'move_depths': list(move_depths),
+            'telemetry': game.telemetry.to_dict() if game.telemetry is not None else None,
+        }
+
+    def addRecord(self, record):
+        """
+        Accumulates the result of one game (see gameRecord()) into the statistics of the current config.
+        :param record:
+        :return:
+        """
+        self.total_heuristic_times += record['heuristic_time']
+        self.total_state_counts += record['state_count']
+        self.total_depth_averages += record['depth_average']
+        for depth, count in record['state_counts_p_depth'].items():
+            depth = int(depth)
+            if depth in self.total_state_counts_p_depth:
+                self.total_state_counts_p_depth[depth] += count
+            else:
+                self.total_state_counts_p_depth[depth] = count
+        self.total_ard_averages += record['ard_average']
+        self.total_move_counter += record['move_count']
+        if record['winning_heuristic'] == 'e1':
+            self.winning_e1 += 1
+        elif record['winning_heuristic'] == 'e2':
+            self.winning_e2 += 1
+
+        self.move_stats['move_time'].extend(record['move_times'])
+        self.move_stats['states_per_move'].extend(record['move_state_counts'])
+        self.move_stats['depth'].extend(record['move_depths'])
+        for name, count in record.get('search_counts', {}).items():
+            self.total_search_counts[name] = self.total_search_counts.get(name, 0) + count
+        if record.get('telemetry') is not None:
+            if self.telemetry is None:
+                self.telemetry = SearchTelemetry()
+            self.telemetry.merge(SearchTelemetry.from_dict(record['telemetry']))
+        self.games_played += 1
+
+    def computeAverages(self):
+        """
+        Divides the accumulated totals by the number of games recorded.
+        :return:
+        """
+        games = max(self.games_played, 1)
+        self.average_heuristic_times = self.total_heuristic_times / games
+        self.average_state_counts = self.total_state_counts / games
+        self.average_depth_averages = self.total_depth_averages / games
+        self.average_total_state_counts_p_depth = {depth: count / games for depth, count in
+                                                   self.total_state_counts_p_depth.items()}
+        self.average_ard_averages = self.total_ard_averages / games
+        self.average_move_counter = self.total_move_counter / games
+
+    def calculateScore(self, config):
+        """
+        Runs 2*r simulations of LineEmUp and calculates all all relevant statistics.
+        With a checkpoint, an interrupted run of the same config resumes after its last completed game,
+        and inside the game that was in progress.
+        :return:
+        """
+        self.reset()
+        checkpoint = Checkpoint(self.checkpoint) if self.checkpoint is not None else None
+        snapshot = checkpoint.load() if checkpoint is not None else None
+        if snapshot is not None and snapshot['config'] == config:
+            params = snapshot['params']
+            records = snapshot['records']
+            random.setstate(snapshot['random'])
+        else:
+            params = self.parseConfig(config)
+            records = []
+        game_params = dict(params)
+        if checkpoint is not None:
+            game_params['checkpoint'] = self.checkpoint + '.game'
+            game_params['checkpoint_interval'] = self.checkpoint_interval
+
+        reporter = self.progressReporter(self.configLabel(params), 2 * self.num_of_games_per_symbol - len(records))
+        for (heuristic_w, heuristic_b) in ((LineEmUp.E1, LineEmUp.E2), (LineEmUp.E2, LineEmUp.E1)):
+            self.g = LineEmUp(heuristic_w=heuristic_w, heuristic_b=heuristic_b, **game_params)
+            self.g.progress = reporter
+            for play in range(0, self.num_of_games_per_symbol):
+                if self.games_played < len(records):
+                    self.addRecord(records[self.games_played])
+                    continue
+
+                self.g.play()
+                record = self.gameRecord(self.g)
+                self.addRecord(record)
+                records.append(record)
+                if reporter is not None:
+                    reporter.game(record)
+                if checkpoint is not None:
+                    checkpoint.save({'config': config, 'params': params, 'records': records,
+                                     'random': random.getstate()})
+
+        if reporter is not None:
+            reporter.finish()
+        if checkpoint is not None:
+            checkpoint.clear()
+        self.computeAverages()
+
+    @staticmethod
+    def configLabel(params):
+        """
+        :param params: LineEmUp arguments of a config (see parseConfig())
+        :return: short description of the config for progress reports
+        """
+        return F"n={params['board_size']} b={params['blocks']} s={params['winning_size']} t={params['max_move_time']}"
+
+    def progressReporter(self, label, total_games):
+        """
+        :return: ProgressReporter for the games of one config, or None if progress is not reported
+        """
+        if not self.progress and self.status_file is None:
+            return None
+        return ProgressReporter(total_games, label, stream=sys.stderr if self.progress else None,
+                                status_file=self.status_file)
+
+    def winningPercentage(self, wins):
+        return round(100.0 * wins / max(self.games_played, 1), 2)
 
     def printAverageEndOfAllGames(self, id):
         """
         Prints the results to a file. calculateScore() must first be called.
+        The streaming statistics are also written as JSON to scoreboard<id>.json.
 
         :return:
         """
@@ -119,8 +280,8 @@ class ScoreBoard:
         file = open('scoreboard' + str(id) + '.txt', 'w+')
         self.g.printIntialGameToFile(file)
         file.write("")
-        file.write("Heuristic 1 winning %: " + str(round(self.winning_e1 / 2.0 * self.num_of_games_per_symbol, 2)) + '\n')
-        file.write("Heuristic 2 winning %: " + str(round(self.winning_e2 / 2.0 * self.num_of_games_per_symbol, 2)) + '\n')
+        file.write("Heuristic 1 winning %: " + str(self.winningPercentage(self.winning_e1)) + '\n')
+        file.write("Heuristic 2 winning %: " + str(self.winningPercentage(self.winning_e2)) + '\n')
         file.write('i. Average of Average evaluation time of heuristic: ' + str(self.average_heuristic_times) + '\n')
         file.write('ii. Average of Total states evaluated: ' + str(self.average_state_counts) + '\n')
         file.write('iii. Average of Average of average depths: ' + str(self.average_depth_averages) + '\n')
@@ -129,4 +290,37 @@ class ScoreBoard:
             file.write("\t" + str(depth) + ": " + str(self.average_total_state_counts_p_depth[depth]) + '\n')
         file.write('v. Average of Average ARD: ' + str(self.average_ard_averages) + '\n')
         file.write('vi. Average Total Move Count: ' + str(self.average_move_counter) + '\n')
+        for metric in self.MOVE_METRICS:
+            stats = self.move_stats[metric]
+            file.write(F'{metric}: mean {stats.mean}, stddev {stats.stddev()}, min {stats.min}, max {stats.max}, '
+                       F'p50 {stats.percentile(50)}, p95 {stats.percentile(95)}\n')
+        for name in sorted(self.total_search_counts.keys()):
+            file.write(F'Average {name}: {self.total_search_counts[name] / max(self.games_played, 1)}\n')
+        if self.telemetry is not None:
+            self.telemetry.write(file)
         file.close()
+
+        with open('scoreboard' + str(id) + '.json', 'w') as json_file:
+            json.dump(self.toDict(), json_file, indent=2)
+
+    def toDict(self):
+        """
+        :return: machine-readable summary of the current config
+        """
+        return {
+            'games': self.games_played,
+            'winning_e1': self.winning_e1,
+            'winning_e2': self.winning_e2,
+            'average_heuristic_time': self.average_heuristic_times,
+            'average_state_count': self.average_state_counts,
+            'average_depth_average': self.average_depth_averages,
+            'average_state_counts_p_depth': {str(depth): count for depth, count in
+                                             self.average_total_state_counts_p_depth.items()},
+            'average_ard_average': self.average_ard_averages,
+            'average_move_count': self.average_move_counter,
+            'average_search_counts': {name: count / max(self.games_played, 1) for name, count in
+                                      self.total_search_counts.items()},
+            'move_stats': {metric: self.move_stats[metric].to_dict() for metric in self.MOVE_METRICS},
+            'telemetry': {'summary': self.telemetry.summary(), 'counters': self.telemetry.to_dict()}
+            if self.telemetry is not None else None,
+        }
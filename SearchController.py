@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import threading
+import time
+
+
+class SearchAborted(Exception):
+    """
+    Raised by SearchController.check() to unwind a search whose deadline has passed or that was cancelled.
+
+    Attributes:
+        ply - ply of the node that was being searched, if the engine passed it to check()
+    """
+
+    def __init__(self, reason, ply=None):
+        super().__init__(reason)
+        self.reason = reason
+        self.ply = ply
+
+
+class SearchController:
+    """
+    Deadline and cancellation of a search, shared by minimax(), alphabeta() and ProofNumberSearch.
+
+    Engines call check() (or expired()) once per node. Only every N-th call reads the monotonic clock,
+    with N adapted to the measured node rate so that the clock is read about once every poll_interval seconds:
+    a deadline then costs a counter decrement per node and is overshot by about poll_interval at most.
+    The node rate carries over from one search to the next.
+
+    A search stops when its time limit is over, when cancel() is called (e.g. from another thread) or when
+    the optional cancel_event (e.g. a multiprocessing.Event set by another process) is set.
+
+    Attributes:
+        stopped - None while the search may continue, otherwise TIMEOUT or CANCELLED
+        nodes - nodes checked since start()
+        polls - clock reads since start()
+    """
+
+    TIMEOUT = 'timeout'
+    CANCELLED = 'cancelled'
+
+    MIN_NODES_PER_POLL = 1
+    MAX_NODES_PER_POLL = 1 << 16
+
+    def __init__(self, poll_interval=0.002, cancel_event=None):
+        """
+        :param poll_interval: target number of seconds between two clock reads
+        :param cancel_event: object with an is_set() method (threading or multiprocessing Event) that cancels
+                             searches while it is set; it is never cleared by the controller
+        """
+        self.poll_interval = poll_interval
+        self.cancel_event = cancel_event
+        self.cancelled = threading.Event()
+        self.nodes_per_poll = 64
+        self.deadline = None
+        self.stopped = None
+        self.nodes = 0
+        self.polls = 0
+        self.countdown = 0
+        self.last_poll = None
+
+    def start(self, time_limit=None):
+        """
+        Starts a search. It clears an earlier cancel(), but not the cancel_event.
+        :param time_limit: seconds the search may take, or None for no limit
+        :return:
+        """
+        now = time.monotonic()
+        self.deadline = now + time_limit if time_limit is not None else None
+        self.stopped = None
+        self.nodes = 0
+        self.polls = 0
+        self.cancelled.clear()
+        self.countdown = self.nodes_per_poll
+        self.last_poll = now
+
+    def cancel(self):
+        """
+        Stops the search in progress at its next poll; safe to call from any thread
+        :return:
+        """
+        self.cancelled.set()
+        # poll at the next node rather than after a full countdown
+        self.countdown = 1
+
+    def remaining(self):
+        """
+        :return: seconds left before the deadline, or None if there is no deadline
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def poll(self):
+        """
+        Reads the clock, adapts the number of nodes between two polls and checks the stop conditions
+        :return: true if the search must stop
+        """
+        now = time.monotonic()
+        elapsed = now - self.last_poll
+        counted = self.nodes_per_poll - self.countdown
+        if elapsed > 0 and counted > 0:
+            rate = counted / elapsed
+            self.nodes_per_poll = int(min(self.MAX_NODES_PER_POLL, max(self.MIN_NODES_PER_POLL,
+                                                                        rate * self.poll_interval)))
+        self.last_poll = now
+        self.polls += 1
+
+        if self.deadline is not None and now >= self.deadline:
+            self.stopped = self.TIMEOUT
+        elif self.cancelled.is_set() or (self.cancel_event is not None and self.cancel_event.is_set()):
+            self.stopped = self.CANCELLED
+        self.countdown = self.nodes_per_poll
+        return self.stopped is not None
+
+    def expired(self):
+        """
+        Counts a node, polling when due.
+        :return: true if the search must stop (and from then on)
+        """
+        if self.stopped is not None:
+            return True
+        self.nodes += 1
+        self.countdown -= 1
+        if self.countdown > 0:
+            return False
+        return self.poll()
+
+    def check(self, ply=None):
+        """
+        Counts a node, polling when due, and raises SearchAborted if the search must stop
+        :param ply: ply of the node, reported by the exception
+        :return:
+        """
+        self.nodes += 1
+        self.countdown -= 1
+        if self.countdown > 0 and self.stopped is None:
+            return
+        if self.stopped is not None or self.poll():
+            raise SearchAborted(self.stopped, ply)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import math
+
+
+class SearchTelemetry:
+    """
+    Counters describing how efficient alphabeta() searches are, per ply.
+    Plies are numbered like LineEmUp.state_count_p_depth: a node at ply d searches the states at depth d,
+    so ply 1 is the root.
+
+    Attributes:
+        nodes - ply -> number of nodes expanded at that ply
+        children - ply -> number of children searched by those nodes
+        cutoffs - ply -> number of beta cutoffs
+        first_move_cutoffs - ply -> number of cutoffs caused by the first child searched
+        children_before_cutoff - ply -> total children searched by nodes that were cut off
+        aborts - ply -> number of moves whose search ran out of time at that ply
+        moves - number of moves searched
+        log_tree_ratio - sum over moves of log(leaves evaluated / leaves of the minimal alphabeta tree)
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.children = {}
+        self.cutoffs = {}
+        self.first_move_cutoffs = {}
+        self.children_before_cutoff = {}
+        self.aborts = {}
+        self.moves = 0
+        self.log_tree_ratio = 0.0
+
+    @staticmethod
+    def increment(counter, ply, amount=1):
+        counter[ply] = counter.get(ply, 0) + amount
+
+    def node(self, ply, children):
+        """
+        Records a node whose search is over
+        :param ply:
+        :param children: number of children searched
+        :return:
+        """
+        self.increment(self.nodes, ply)
+        self.increment(self.children, ply, children)
+
+    def cutoff(self, ply, children):
+        """
+        Records a beta cutoff
+        :param ply:
+        :param children: number of children searched, including the one causing the cutoff
+        :return:
+        """
+        self.increment(self.cutoffs, ply)
+        self.increment(self.children_before_cutoff, ply, children)
+        if children == 1:
+            self.increment(self.first_move_cutoffs, ply)
+
+    def abort(self, ply):
+        self.increment(self.aborts, ply)
+
+    @staticmethod
+    def minimal_leaves(branching, depth):
+        """
+        Leaves of the minimal alphabeta tree (perfect move ordering): b^ceil(d/2) + b^floor(d/2) - 1
+        """
+        return branching ** math.ceil(depth / 2) + branching ** math.floor(depth / 2) - 1
+
+    def move(self, branching, depth, leaves):
+        """
+        Records a completed move search
+        :param branching: number of legal moves at the root
+        :param depth: search depth
+        :param leaves: number of leaves evaluated
+        :return:
+        """
+        depth = min(depth, branching)
+        minimal = self.minimal_leaves(branching, depth)
+        if minimal > 0 and leaves > 0:
+            self.moves += 1
+            self.log_tree_ratio += math.log(leaves / minimal)
+
+    def merge(self, other):
+        for name in ('nodes', 'children', 'cutoffs', 'first_move_cutoffs', 'children_before_cutoff', 'aborts'):
+            counter = getattr(self, name)
+            for ply, count in getattr(other, name).items():
+                self.increment(counter, ply, count)
+        self.moves += other.moves
+        self.log_tree_ratio += other.log_tree_ratio
+        return self
+
+    def summary(self):
+        """
+        :return: per ply effective branching factor, cutoff rate, first-move cutoff fraction and
+                 average children searched before a cutoff, plus the geometric mean ratio of the
+                 searched tree to the minimal b^(d/2) tree
+        """
+        plies = {}
+        for ply in sorted(self.nodes.keys()):
+            nodes = self.nodes[ply]
+            cutoffs = self.cutoffs.get(ply, 0)
+            plies[ply] = {
+                'nodes': nodes,
+                'branching_factor': self.children.get(ply, 0) / nodes,
+                'cutoffs': cutoffs,
+                'cutoff_rate': cutoffs / nodes,
+                'first_move_cutoff_rate': self.first_move_cutoffs.get(ply, 0) / cutoffs if cutoffs else None,
+                'children_before_cutoff': self.children_before_cutoff.get(ply, 0) / cutoffs if cutoffs else None,
+                'aborts': self.aborts.get(ply, 0),
+            }
+        return {
+            'plies': plies,
+            'moves': self.moves,
+            'tree_to_minimal_ratio': math.exp(self.log_tree_ratio / self.moves) if self.moves else None,
+        }
+
+    def to_dict(self):
+        """
+        :return: JSON-serializable raw counters (see from_dict())
+        """
+        data = {name: {str(ply): count for ply, count in getattr(self, name).items()}
+                for name in ('nodes', 'children', 'cutoffs', 'first_move_cutoffs', 'children_before_cutoff', 'aborts')}
+        data['moves'] = self.moves
+        data['log_tree_ratio'] = self.log_tree_ratio
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        telemetry = cls()
+        for name in ('nodes', 'children', 'cutoffs', 'first_move_cutoffs', 'children_before_cutoff', 'aborts'):
+            setattr(telemetry, name, {int(ply): count for ply, count in data[name].items()})
+        telemetry.moves = data['moves']
+        telemetry.log_tree_ratio = data['log_tree_ratio']
+        return telemetry
+
+    def write(self, printer):
+        """
+        Prints the summary to a PrintManager or file
+        :param printer:
+        :return:
+        """
+        summary = self.summary()
+        printer.write('Search telemetry (ply: nodes, branching factor, cutoff rate, first-move cutoffs, '
+                      'children before cutoff, time aborts):\n')
+        for ply, stats in summary['plies'].items():
+            printer.write(F"\t{ply}: {stats['nodes']}, {stats['branching_factor']:.2f}, {stats['cutoff_rate']:.3f}, "
+                          F"{stats['first_move_cutoff_rate']}, {stats['children_before_cutoff']}, "
+                          F"{stats['aborts']}\n")
+        printer.write(F"Searched tree / minimal tree: {summary['tree_to_minimal_ratio']}\n")
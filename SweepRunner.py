@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import hashlib
+import json
+import os
+import random
+from LineEmUp import LineEmUp
+from ScoreBoard import ScoreBoard
+
+
+class ResultStore:
+    """
+    Local directory of game results keyed by content hash, one JSON file per result.
+    Files are written atomically so an interrupted sweep never leaves a half-written result behind.
+    """
+
+    def __init__(self, path='results'):
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def key(*parts):
+        """
+        :param parts: JSON-serializable values identifying a result
+        :return: hex digest of the canonical JSON encoding of parts
+        """
+        encoded = json.dumps(parts, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def filepath(self, key):
+        return os.path.join(self.path, key[:2], key + '.json')
+
+    def has(self, key):
+        return os.path.exists(self.filepath(key))
+
+    def get(self, key):
+        with open(self.filepath(key)) as file:
+            return json.load(file)
+
+    def put(self, key, record):
+        path = self.filepath(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.' + str(os.getpid()) + '.tmp'
+        with open(tmp, 'w') as file:
+            json.dump(record, file)
+        os.replace(tmp, path)
+
+
+class SweepRunner:
+    """
+    Runs the ScoreBoard tournament for a list of configurations, one game at a time,
+    storing every game in a ResultStore. Games already in the store are skipped, so an
+    interrupted sweep resumes where it stopped. The most expensive configs are played first.
+
+    Attributes:
+        num_of_games_per_symbol - number of games to be simulated per color (i.e. total games = 2*r)
+        store - ResultStore holding the results of completed games
+        seed - base seed; together with the config, heuristic assignment and game index it fixes every game
+        progress - whether run() reports its progress on a status line
+        status_file - path of a JSON file run() keeps updated with its progress, or None
+        checkpoint_interval - if set, the game in progress is snapshotted next to its result every
+                              checkpoint_interval seconds, so an interrupted sweep also resumes inside it
+    """
+
+    # (heuristic_w, heuristic_b) for both halves of a ScoreBoard tournament
+    ASSIGNMENTS = ((LineEmUp.E1, LineEmUp.E2), (LineEmUp.E2, LineEmUp.E1))
+
+    # rough cost of evaluating a single state, in seconds
+    STATE_COST = 0.00005
+
+    def __init__(self, r=10, store='results', seed=0, progress=True, status_file=None, checkpoint_interval=None):
+        self.num_of_games_per_symbol = r
+        self.store = ResultStore(store)
+        self.seed = seed
+        self.progress = progress
+        self.status_file = status_file
+        self.checkpoint_interval = checkpoint_interval
+
+    def normalize(self, config):
+        """
+        Converts a config (structured or legacy "conf" string) into a canonical dict.
+        Random blocks are resolved with a generator seeded from the config so that the
+        same entry always hashes to, and plays on, the same board.
+        :param config:
+        :return: dict
+        """
+        rng = random.Random(ResultStore.key(self.seed, config))
+        params = ScoreBoard.parseConfig(config, rng)
+        normalized = {
+            'n': params['board_size'],
+            'b': params['blocks'],
+            's': params['winning_size'],
+            't': params['max_move_time'],
+            'd1': params['d1'],
+            'd2': params['d2'],
+            'a1': params['a1'] == LineEmUp.ALPHABETA,
+            'a2': params['a2'] == LineEmUp.ALPHABETA,
+            'blocks': [list(coord) for coord in params['blocks_coord']],
+        }
+        # keep any extra search options so they take part in the hash
+        for option in config:
+            if option not in normalized and option != 'conf':
+                normalized[option] = config[option]
+        return normalized
+
+    def estimateCost(self, config):
+        """
+        Estimates the time needed to play all games of a normalized config.
+        Each move is bounded by t; otherwise its cost grows with the branching factor
+        to the power of the depth (half the depth with alphabeta).
+        :param config: normalized config
+        :return: estimated seconds
+        """
+        branching = max(config['n'] * config['n'] - config['b'], 1)
+
+        def move_cost(depth, alphabeta):
+            effective_depth = depth / 2.0 if alphabeta else depth
+            return min(config['t'], self.STATE_COST * branching ** effective_depth)
+
+        per_game = branching / 2.0 * (move_cost(config['d1'], config['a1']) + move_cost(config['d2'], config['a2']))
+        return per_game * 2 * self.num_of_games_per_symbol
+
+    def tasks(self, config):
+        """
+        :param config: normalized config
+        :return: list of tasks (one per game) for the config
+        """
+        tasks = []
+        for heuristic_w, heuristic_b in self.ASSIGNMENTS:
+            for game in range(0, self.num_of_games_per_symbol):
+                seed = int(ResultStore.key(self.seed, config, heuristic_w, heuristic_b, game)[:16], 16)
+                tasks.append({
+                    'config': config,
+                    'heuristic_w': heuristic_w,
+                    'heuristic_b': heuristic_b,
+                    'game': game,
+                    'seed': seed,
+                    'key': ResultStore.key(config, heuristic_w, heuristic_b, game, seed),
+                })
+        return tasks
+
+    @staticmethod
+    def runTask(task, progress=None, checkpoint=None, checkpoint_interval=60.0):
+        """
+        Plays the single game described by a task.
+        :param task:
+        :param progress: ProgressReporter notified after every move, if any
+        :param checkpoint: file the game is snapshotted into and resumed from, if any
+        :param checkpoint_interval:
+        :return: game record (see ScoreBoard.gameRecord())
+        """
+        random.seed(task['seed'])
+        params = ScoreBoard.parseConfig(task['config'])
+        game = LineEmUp(heuristic_w=task['heuristic_w'], heuristic_b=task['heuristic_b'], checkpoint=checkpoint,
+                        checkpoint_interval=checkpoint_interval, **params)
+        game.progress = progress
+        game.play()
+        return ScoreBoard.gameRecord(game)
+
+    def scoreboard(self, config):
+        """
+        Builds a ScoreBoard for a config from the records in the store.
+        :param config: normalized config whose tasks have all completed
+        :return: ScoreBoard
+        """
+        sboard = ScoreBoard(self.num_of_games_per_symbol)
+        for task in self.tasks(config):
+            sboard.addRecord(self.store.get(task['key']))
+        sboard.computeAverages()
+        heuristic_w, heuristic_b = self.ASSIGNMENTS[-1]
+        sboard.g = LineEmUp(heuristic_w=heuristic_w, heuristic_b=heuristic_b, **ScoreBoard.parseConfig(config))
+        return sboard
+
+    def run(self, configs):
+        """
+        Plays every missing game of every config, most expensive config first,
+        and writes scoreboard<i>.txt/.json for config i as soon as all of its games are stored.
+        :param configs: list of configs as found in configurations.json
+        :return:
+        """
+        normalized = [self.normalize(config) for config in configs]
+        order = sorted(range(len(normalized)), key=lambda i: self.estimateCost(normalized[i]), reverse=True)
+
+        sboard = ScoreBoard(self.num_of_games_per_symbol, self.progress, self.status_file)
+        for i in order:
+            missing = [task for task in self.tasks(normalized[i]) if not self.store.has(task['key'])]
+            reporter = sboard.progressReporter(F'config {i}', len(missing)) if missing else None
+            for task in missing:
+                checkpoint = None
+                if self.checkpoint_interval is not None:
+                    checkpoint = os.path.splitext(self.store.filepath(task['key']))[0] + '.checkpoint'
+                    os.makedirs(os.path.dirname(checkpoint), exist_ok=True)
+                record = self.runTask(task, reporter, checkpoint, self.checkpoint_interval)
+                self.store.put(task['key'], record)
+                if reporter is not None:
+                    reporter.game(record)
+            if reporter is not None:
+                reporter.finish()
+            self.scoreboard(normalized[i]).printAverageEndOfAllGames(i)
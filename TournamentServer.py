@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import threading
+import time
+from SweepRunner import SweepRunner
+
+
+def request(host, port, message, timeout=30):
+    """
+    Sends one JSON message to the coordinator and returns its JSON reply.
+    Every request uses its own connection, so a worker never holds a socket while it plays.
+    :param host:
+    :param port:
+    :param message: dict
+    :param timeout: socket timeout in seconds
+    :return: dict
+    """
+    with socket.create_connection((host, port), timeout=timeout) as connection:
+        connection.sendall((json.dumps(message) + '\n').encode('utf-8'))
+        reply = connection.makefile('r', encoding='utf-8').readline()
+    return json.loads(reply)
+
+
+class Server(socketserver.ThreadingTCPServer):
+    """
+    Threaded TCP server that can rebind the port of a coordinator that just exited
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class Coordinator:
+    """
+    Hands out the games of a ScoreBoard sweep to workers over TCP and collects their results.
+
+    Tasks are the same (config, heuristic assignment, game index, seed) units as SweepRunner's, so results
+    land in the same ResultStore and a sweep can mix local and distributed runs. A task handed to a worker is
+    leased for lease_timeout seconds; workers renew their lease while playing, and a task whose lease runs out
+    (e.g. the worker crashed) is put back in the queue.
+
+    Protocol: one JSON line per request and reply.
+        {"op": "get"}                                   -> {"task": task, "lease": id} | {"task": null, "wait": s}
+                                                           | {"task": null, "done": true}
+        {"op": "renew", "lease": id}                    -> {"ok": bool}
+        {"op": "result", "lease": id, "key": key, "record": record} -> {"ok": bool}
+    Unknown operations and malformed messages are answered with {"ok": false, "error": message}.
+    """
+
+    # seconds the server keeps running after the last result, so idle workers can be told to stop
+    GRACE_PERIOD = 2.0
+    # seconds between two checks of the local workers while waiting for results
+    POLL_INTERVAL = 1.0
+
+    def __init__(self, configs, r=10, store='results', seed=0, host='0.0.0.0', port=5050, lease_timeout=60):
+        self.runner = SweepRunner(r, store=store, seed=seed)
+        self.lease_timeout = lease_timeout
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+
+        self.configs = [self.runner.normalize(config) for config in configs]
+        order = sorted(range(len(self.configs)), key=lambda i: self.runner.estimateCost(self.configs[i]),
+                       reverse=True)
+        # pending tasks, most expensive config first
+        self.pending = []
+        for i in order:
+            for task in self.runner.tasks(self.configs[i]):
+                if not self.runner.store.has(task['key']):
+                    self.pending.append(task)
+        self.pending.reverse()
+        self.keys = set(task['key'] for task in self.pending)
+        self.leases = {}
+        self.next_lease = 0
+        if not self.pending:
+            self.finished.set()
+
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    reply = coordinator.handle(json.loads(self.rfile.readline()))
+                except (ValueError, KeyError, TypeError) as error:
+                    # malformed messages get an error reply rather than a closed connection
+                    reply = {'ok': False, 'error': F'{type(error).__name__}: {error}'}
+                self.wfile.write((json.dumps(reply) + '\n').encode('utf-8'))
+
+        self.server = Server((host, port), Handler)
+        self.port = self.server.server_address[1]
+
+    def requeueExpired(self):
+        """
+        Puts tasks whose lease has expired back at the front of the queue. Must be called with the lock held.
+        :return:
+        """
+        now = time.monotonic()
+        for lease, (task, deadline) in list(self.leases.items()):
+            if deadline < now:
+                del self.leases[lease]
+                self.pending.append(task)
+
+    def handle(self, message):
+        with self.lock:
+            self.requeueExpired()
+
+            if message['op'] == 'get':
+                if self.pending:
+                    task = self.pending.pop()
+                    self.next_lease += 1
+                    self.leases[self.next_lease] = (task, time.monotonic() + self.lease_timeout)
+                    return {'task': task, 'lease': self.next_lease, 'lease_timeout': self.lease_timeout}
+                if self.leases:
+                    return {'task': None, 'wait': min(1.0, self.lease_timeout / 4.0)}
+                return {'task': None, 'done': True}
+
+            elif message['op'] == 'renew':
+                if message['lease'] not in self.leases:
+                    return {'ok': False}
+                task, _ = self.leases[message['lease']]
+                self.leases[message['lease']] = (task, time.monotonic() + self.lease_timeout)
+                return {'ok': True}
+
+            elif message['op'] == 'result':
+                key = message['key']
+                if key not in self.keys:
+                    return {'ok': False}
+                # the first result for a task wins, including a late one from an expired lease
+                if not self.runner.store.has(key):
+                    self.runner.store.put(key, message['record'])
+                self.pending = [task for task in self.pending if task['key'] != key]
+                for lease, (task, _) in list(self.leases.items()):
+                    if task['key'] == key:
+                        del self.leases[lease]
+                if not self.pending and not self.leases:
+                    self.finished.set()
+                return {'ok': True}
+
+            return {'ok': False, 'error': "Unknown operation: " + str(message['op'])}
+
+    def run(self, processes=None):
+        """
+        Serves tasks until every game has a result, then writes scoreboard<i>.txt/.json for every config.
+        :param processes: local worker processes; the sweep is stopped with an error once all of them have exited
+                          while tasks remain (without them, it waits for remote workers indefinitely)
+        :return:
+        """
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        while not self.finished.wait(self.POLL_INTERVAL):
+            if processes and not any(process.is_alive() for process in processes):
+                # a late result may have completed the sweep just as the last worker exited
+                if self.finished.is_set():
+                    break
+                self.server.shutdown()
+                self.server.server_close()
+                with self.lock:
+                    remaining = len(self.pending) + len(self.leases)
+                exit_codes = ', '.join(str(process.exitcode) for process in processes)
+                raise RuntimeError(F'All workers exited (exit codes: {exit_codes}) with {remaining} tasks left')
+        # keep answering for a moment so that waiting workers are told the sweep is done
+        time.sleep(self.GRACE_PERIOD)
+        self.server.shutdown()
+        self.server.server_close()
+        for i, config in enumerate(self.configs):
+            self.runner.scoreboard(config).printAverageEndOfAllGames(i)
+
+
+class Worker:
+    """
+    Fetches tasks from a Coordinator, plays them with LineEmUp and returns the game records.
+    A background thread renews the lease of the current task until the game is over.
+    Games write their gameTrace and log.log files to the current directory, so workers sharing a directory
+    must be given their own output directory.
+    """
+
+    def __init__(self, host='localhost', port=5050, output=None):
+        """
+        :param host:
+        :param port:
+        :param output: directory the worker process moves to before playing, so that its traces are its own
+        """
+        self.host = host
+        self.port = port
+        self.output = output
+
+    def renew(self, lease, interval, done):
+        while not done.wait(interval):
+            try:
+                if not request(self.host, self.port, {'op': 'renew', 'lease': lease})['ok']:
+                    return
+            except (OSError, ValueError):
+                return
+
+    def run(self):
+        """
+        Works until the coordinator reports that the sweep is done or can no longer be reached.
+        :return: number of games played
+        """
+        if self.output is not None:
+            os.makedirs(self.output, exist_ok=True)
+            os.chdir(self.output)
+
+        played = 0
+        while True:
+            try:
+                reply = request(self.host, self.port, {'op': 'get'})
+            except (OSError, ValueError):
+                return played
+            if reply.get('done') or 'error' in reply:
+                return played
+            if reply['task'] is None:
+                time.sleep(reply['wait'])
+                continue
+
+            done = threading.Event()
+            renewer = threading.Thread(target=self.renew, args=(reply['lease'], reply['lease_timeout'] / 3.0, done),
+                                       daemon=True)
+            renewer.start()
+            try:
+                record = SweepRunner.runTask(reply['task'])
+            finally:
+                done.set()
+            try:
+                request(self.host, self.port,
+                        {'op': 'result', 'lease': reply['lease'], 'key': reply['task']['key'], 'record': record})
+            except (OSError, ValueError):
+                return played
+            played += 1
+
+
+def work(host, port, output=None):
+    Worker(host, port, output).run()
+
+
+def run_local(configs, workers=4, r=10, store='results', seed=0, lease_timeout=60, output='worker-traces'):
+    """
+    Runs a coordinator and `workers` worker processes on this machine.
+    Worker i writes its game traces to <output>/worker-i.
+    Raises RuntimeError if every worker exits before all games have a result (e.g. a game raised an error).
+    :return:
+    """
+    coordinator = Coordinator(configs, r=r, store=store, seed=seed, host='localhost', port=0,
+                              lease_timeout=lease_timeout)
+    output = os.path.abspath(output)
+    processes = [multiprocessing.Process(target=work, args=('localhost', coordinator.port,
+                                                            os.path.join(output, F'worker-{i}')))
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+    coordinator.run(processes)
+    for process in processes:
+        process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Distributed ScoreBoard tournaments.')
+    parser.add_argument('mode', choices=['coordinator', 'worker', 'local'])
+    parser.add_argument('--host', default='localhost', help='coordinator host (worker mode)')
+    parser.add_argument('--port', type=int, default=5050)
+    parser.add_argument('--configs', default='./configurations.json')
+    parser.add_argument('--r', type=int, default=5, help='games per color and config')
+    parser.add_argument('--store', default='results')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--lease', type=float, default=60, help='lease timeout in seconds')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(), help='worker processes (local mode)')
+    parser.add_argument('--output', default=None,
+                        help='directory for game traces (worker mode; local mode uses worker-traces/worker-<i>)')
+    args = parser.parse_args()
+
+    if args.mode == 'worker':
+        Worker(args.host, args.port, args.output).run()
+        return
+
+    with open(args.configs) as config_file:
+        configs = json.load(config_file)
+    if args.mode == 'coordinator':
+        Coordinator(configs, r=args.r, store=args.store, seed=args.seed, port=args.port,
+                    lease_timeout=args.lease).run()
+    else:
+        run_local(configs, args.workers, r=args.r, store=args.store, seed=args.seed, lease_timeout=args.lease,
+                  output=args.output or 'worker-traces')
+
+
+if __name__ == "__main__":
+    main()
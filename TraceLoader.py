@@ -0,0 +1,361 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import argparse
+import csv
+import glob
+import os
+import numpy as np
+from LineEmUp import LineEmUp
+from Position import Position
+
+
+class TraceLoader:
+    """
+    Streams gameTrace-*.txt and scoreboard*.txt files into three columnar tables:
+        games - one row per game trace: config header, end-of-game stats and the result
+        moves - one row per move of every game (row `game` of the games table)
+        scoreboards - one row per scoreboard file
+
+    Each table is a dict of column name -> NumPy array. "states_per_depth" columns are 2D: column d - 1 holds
+    the number of states evaluated at depth d. Results are encoded as 1 (White), 2 (Black), 0 (tie), -1 (unknown).
+
+    Game results are not written to traces, so they are inferred from the last board drawn.
+    """
+
+    HEADER_KEYS = ('n', 'b', 's', 't', 'd1', 'd2')
+    RESULT_CODES = {'W': 1, 'B': 2, '.': 0, None: -1}
+
+    GAME_COLUMNS = ('file', 'n', 'b', 's', 't', 'd1', 'd2', 'a1', 'a2', 'heuristic_w', 'heuristic_b',
+                    'avg_heuristic_time', 'total_states', 'avg_depth', 'avg_ard', 'move_count', 'result',
+                    'first_move', 'moves')
+    MOVE_COLUMNS = ('game', 'move', 'player', 'value', 'eval_time', 'heuristic_time', 'states', 'avg_depth', 'ard')
+    SCOREBOARD_COLUMNS = ('file', 'n', 'b', 's', 't', 'd1', 'd2', 'a1', 'a2', 'heuristic_w', 'heuristic_b',
+                          'e1_win', 'e2_win', 'avg_heuristic_time', 'avg_states', 'avg_depth', 'avg_ard', 'avg_moves')
+
+    def __init__(self):
+        self.files = []
+        self.games = {column: [] for column in self.GAME_COLUMNS}
+        self.game_depths = []
+        self.moves = {column: [] for column in self.MOVE_COLUMNS}
+        self.move_depths = []
+        self.scoreboards = {column: [] for column in self.SCOREBOARD_COLUMNS}
+        self.scoreboard_depths = []
+
+    @staticmethod
+    def parse_header(line, header):
+        """
+        Parses a config header line (n, b, s, t, d1, d2, algorithms and heuristics) into header.
+        :return: True if the line was a header line
+        """
+        key, _, value = line.partition(': ')
+        value = value.strip()
+        if key == 't':
+            # max_move_time may be fractional
+            header[key] = float(value)
+        elif key in TraceLoader.HEADER_KEYS:
+            header[key] = int(value)
+        elif key == 'Algo for White':
+            header['a1'] = int(value == 'ALPHABETA')
+        elif key == 'Algo for Black':
+            header['a2'] = int(value == 'ALPHABETA')
+        elif key == 'Player White heuristic':
+            header['heuristic_w'] = int(value[1:]) - 1
+        elif key == 'Player Black heuristic':
+            header['heuristic_b'] = int(value[1:]) - 1
+        elif key in ('Player White', 'Player Black'):
+            pass
+        else:
+            return False
+        return True
+
+    @staticmethod
+    def board_result(board, winning_size):
+        """
+        :param board: rows of tokens of the last board drawn
+        :param winning_size:
+        :return: 'W', 'B', '.' or None, as LineEmUp.is_end()
+        """
+        if not board:
+            return None
+        # loading the board as a position registers its blocks, so the matching is_end() kernel is used
+        game = LineEmUp()
+        game.set_position(Position(len(board), winning_size, [''.join(row) for row in board]))
+        return game.is_end()
+
+    def load(self, paths):
+        """
+        Parses every file in paths; gameTrace and scoreboard files are told apart by their name.
+        :param paths: iterable of file paths
+        :return: self
+        """
+        for path in paths:
+            if os.path.basename(path).startswith('scoreboard'):
+                self.load_scoreboard(path)
+            else:
+                self.load_trace(path)
+        return self
+
+    def start_game(self, file_id, header):
+        game = {column: np.nan for column in self.GAME_COLUMNS}
+        game.update(header)
+        game['file'] = file_id
+        game['first_move'] = len(self.moves['game'])
+        return game
+
+    def end_game(self, game, depths, board):
+        game['moves'] = len(self.moves['game']) - game['first_move']
+        game['result'] = self.RESULT_CODES[self.board_result(board, int(game['s']))]
+        for column in self.GAME_COLUMNS:
+            self.games[column].append(game[column])
+        self.game_depths.append(depths)
+
+    def load_trace(self, path):
+        """
+        Streams a gameTrace file. Several games written to the same file one after the other are all loaded.
+        :param path:
+        :return:
+        """
+        file_id = len(self.files)
+        self.files.append(path)
+        header = {}
+        game = None
+        game_depths = {}
+        move = None
+        depths = None
+        board = []
+        in_board = False
+
+        with open(path) as file:
+            for line in file:
+                first = line[:1]
+
+                # rows of a drawn board start with a token
+                if first in ('.', 'W', 'B', 'x'):
+                    if not in_board:
+                        board = []
+                        in_board = True
+                    board.append(line.split())
+                    continue
+                in_board = False
+
+                if first == '\t':
+                    if depths is not None:
+                        depth, _, count = line.partition(':')
+                        depths[int(depth)] = int(count)
+                elif line.startswith('Search telemetry'):
+                    depths = None
+                elif line.startswith('Heuristic returned: '):
+                    if game is None:
+                        game = self.start_game(file_id, header)
+                    move = {'game': len(self.games['file']), 'move': len(self.moves['game']) - game['first_move'],
+                            'value': float(line[20:])}
+                    move['player'] = 1 + move['move'] % 2
+                    depths = {}
+                elif line.startswith('i. Evaluation time: '):
+                    eval_time, _, heuristic_time = line[20:].partition('si. Heuristic evaluation time: ')
+                    move['eval_time'] = float(eval_time)
+                    move['heuristic_time'] = float(heuristic_time)
+                elif line.startswith('ii. Number of states evaluated: '):
+                    move['states'] = int(line[32:])
+                elif line.startswith('iv. Average depths of heuristic evaluation: '):
+                    move['avg_depth'] = float(line[44:])
+                elif line.startswith('v. ARD: '):
+                    move['ard'] = float(line[8:])
+                    for column in self.MOVE_COLUMNS:
+                        self.moves[column].append(move.get(column, np.nan))
+                    self.move_depths.append(depths)
+                elif line.startswith('i. Average evaluation time of heuristic: '):
+                    if game is None:
+                        game = self.start_game(file_id, header)
+                    game['avg_heuristic_time'] = float(line[41:])
+                elif line.startswith('ii. Total states evaluated: '):
+                    game['total_states'] = int(line[28:])
+                elif line.startswith('iii. Average of average depths: '):
+                    game['avg_depth'] = float(line[32:])
+                elif line.startswith('iv. Total number of states evaluated at each depth:'):
+                    game_depths = {}
+                    depths = game_depths
+                elif line.startswith('v. Average ARD: '):
+                    game['avg_ard'] = float(line[16:])
+                elif line.startswith('vi. Total Move Count: '):
+                    game['move_count'] = int(line[22:])
+                elif line.startswith('n: '):
+                    # a new header starts the next game of the file
+                    if game is not None:
+                        self.end_game(game, game_depths, board)
+                        game = None
+                        game_depths = {}
+                        board = []
+                    header = {}
+                    self.parse_header(line, header)
+                else:
+                    self.parse_header(line, header)
+
+        if game is not None:
+            self.end_game(game, game_depths, board)
+
+    def load_scoreboard(self, path):
+        """
+        Parses a scoreboard file
+        :param path:
+        :return:
+        """
+        file_id = len(self.files)
+        self.files.append(path)
+        row = {column: np.nan for column in self.SCOREBOARD_COLUMNS}
+        row['file'] = file_id
+        depths = {}
+        in_depths = False
+
+        with open(path) as file:
+            for line in file:
+                if line.startswith('\t'):
+                    if in_depths:
+                        depth, _, count = line.partition(':')
+                        depths[int(depth)] = float(count)
+                    continue
+                in_depths = line.startswith('iv. Average Total number of states evaluated at each depth')
+                if line.startswith('Heuristic 1 winning %: '):
+                    row['e1_win'] = float(line[23:])
+                elif line.startswith('Heuristic 2 winning %: '):
+                    row['e2_win'] = float(line[23:])
+                elif line.startswith('i. Average of Average evaluation time of heuristic: '):
+                    row['avg_heuristic_time'] = float(line[52:])
+                elif line.startswith('ii. Average of Total states evaluated: '):
+                    row['avg_states'] = float(line[39:])
+                elif line.startswith('iii. Average of Average of average depths: '):
+                    row['avg_depth'] = float(line[43:])
+                elif line.startswith('v. Average of Average ARD: '):
+                    row['avg_ard'] = float(line[27:])
+                elif line.startswith('vi. Average Total Move Count: '):
+                    row['avg_moves'] = float(line[30:])
+                else:
+                    self.parse_header(line, row)
+
+        for column in self.SCOREBOARD_COLUMNS:
+            self.scoreboards[column].append(row[column])
+        self.scoreboard_depths.append(depths)
+
+    @staticmethod
+    def depth_matrix(rows, dtype):
+        """
+        :param rows: list of dicts depth -> count
+        :return: (len(rows), max depth) array
+        """
+        max_depth = max([max(depths.keys(), default=0) for depths in rows], default=0)
+        matrix = np.zeros((len(rows), max_depth), dtype=dtype)
+        for r, depths in enumerate(rows):
+            for depth, count in depths.items():
+                matrix[r, depth - 1] = count
+        return matrix
+
+    def tables(self):
+        """
+        :return: dict of table name -> dict of column name -> NumPy array
+        """
+        games = {column: np.array(values, dtype=np.float64) for column, values in self.games.items()}
+        for column in ('file', 'n', 'b', 's', 'd1', 'd2', 'result', 'first_move', 'moves'):
+            games[column] = games[column].astype(np.int64)
+        games['states_per_depth'] = self.depth_matrix(self.game_depths, np.int64)
+
+        moves = {column: np.array(values, dtype=np.float64) for column, values in self.moves.items()}
+        for column in ('game', 'move', 'player', 'states'):
+            moves[column] = moves[column].astype(np.int64)
+        moves['states_per_depth'] = self.depth_matrix(self.move_depths, np.int64)
+
+        scoreboards = {column: np.array(values, dtype=np.float64) for column, values in self.scoreboards.items()}
+        scoreboards['file'] = scoreboards['file'].astype(np.int64)
+        scoreboards['states_per_depth'] = self.depth_matrix(self.scoreboard_depths, np.float64)
+
+        return {'files': {'path': np.array(self.files, dtype=np.str_)}, 'games': games, 'moves': moves,
+                'scoreboards': scoreboards}
+
+
+def save_store(tables, path):
+    """
+    Writes tables as a directory of .npy files (<path>/<table>/<column>.npy) so they can be memory-mapped.
+    :param tables: output of TraceLoader.tables()
+    :param path:
+    :return:
+    """
+    for table, columns in tables.items():
+        os.makedirs(os.path.join(path, table), exist_ok=True)
+        for column, values in columns.items():
+            np.save(os.path.join(path, table, column + '.npy'), values)
+
+
+def save_npz(tables, path):
+    """
+    Writes tables to a single compressed .npz file, with "<table>/<column>" keys.
+    """
+    np.savez_compressed(path, **{table + '/' + column: values
+                                 for table, columns in tables.items() for column, values in columns.items()})
+
+
+def save_csv(tables, path):
+    """
+    Writes one CSV file per table in path; 2D columns are expanded into <column>_1, <column>_2, ...
+    """
+    os.makedirs(path, exist_ok=True)
+    for table, columns in tables.items():
+        names = []
+        data = []
+        for column, values in columns.items():
+            if values.ndim == 2:
+                names.extend(column + '_' + str(d + 1) for d in range(values.shape[1]))
+                data.extend(values[:, d] for d in range(values.shape[1]))
+            else:
+                names.append(column)
+                data.append(values)
+        with open(os.path.join(path, table + '.csv'), 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(names)
+            writer.writerows(zip(*[values.tolist() for values in data]))
+
+
+class ColumnStore:
+    """
+    Memory-mapped reader for a store written by save_store(): store['moves']['states'] maps the column lazily,
+    so repeated queries only touch the pages they need.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.columns = {}
+
+    def tables(self):
+        return sorted(os.listdir(self.path))
+
+    def column(self, table, column):
+        key = (table, column)
+        if key not in self.columns:
+            self.columns[key] = np.load(os.path.join(self.path, table, column + '.npy'), mmap_mode='r')
+        return self.columns[key]
+
+    def __getitem__(self, table):
+        names = [name[:-4] for name in os.listdir(os.path.join(self.path, table)) if name.endswith('.npy')]
+        return {name: self.column(table, name) for name in names}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert gameTrace and scoreboard files to columnar NumPy/CSV.')
+    parser.add_argument('paths', nargs='*', help='files to load (default: gameTrace-*.txt and scoreboard*.txt)')
+    parser.add_argument('--store', default='traces', help='output directory of memory-mappable .npy columns')
+    parser.add_argument('--npz', help='also write a single .npz file')
+    parser.add_argument('--csv', help='also write CSV files to this directory')
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob('gameTrace-*.txt')) + sorted(glob.glob('scoreboard*.txt'))
+    tables = TraceLoader().load(paths).tables()
+    save_store(tables, args.store)
+    if args.npz:
+        save_npz(tables, args.npz)
+    if args.csv:
+        save_csv(tables, args.csv)
+    print(F"{len(tables['games']['file'])} games, {len(tables['moves']['game'])} moves, "
+          F"{len(tables['scoreboards']['file'])} scoreboards")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import argparse
+import multiprocessing
+import random
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+
+class SharedTranspositionTable:
+    """
+    Fixed-size transposition table in shared memory that several processes can probe and store into without locks.
+
+    Every slot is 24 bytes: a check word, a data word packing (depth, bound, move) and the value as a double.
+    The check word is key ^ data ^ value bits (the "lockless hashing" trick): a slot torn by two processes
+    writing at the same time no longer satisfies check ^ data ^ value == key, so it reads as a miss instead
+    of returning mixed up data.
+
+    Attributes:
+        slots - number of entries; a key is stored in slot key % slots (always-replace unless a deeper
+                result for the same key is already there)
+        name - name of the shared memory block, used by other processes to attach to it
+    """
+
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+    # or-ed into the bound by searches whose value is a win or loss rather than a heuristic score
+    WIN = 4
+    NO_MOVE = 0xFFFF
+
+    SLOT = struct.Struct('<QQd')
+
+    def __init__(self, slots=1 << 20, name=None, create=True):
+        """
+        :param slots: number of entries
+        :param name: name of an existing block to attach to (create=False), or of the block to create
+        :param create: create a new zeroed block, or attach to an existing one
+        """
+        self.slots = slots
+        if create:
+            self.memory = shared_memory.SharedMemory(name=name, create=True, size=slots * self.SLOT.size)
+            self.memory.buf[:] = bytes(slots * self.SLOT.size)
+        else:
+            self.memory = self.attach_memory(name)
+        self.name = self.memory.name
+        self.owner = create
+        self.buffer = self.memory.buf
+
+    @staticmethod
+    def attach_memory(name):
+        try:
+            return shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # before Python 3.13, attaching registers the block with the resource tracker, which would then
+            # destroy it when this process exits; the creator alone is responsible for unlinking it
+            from multiprocessing import resource_tracker
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                return shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+
+    def __reduce__(self):
+        # processes receiving the table attach to the same block instead of copying it
+        return self.__class__, (self.slots, self.name, False)
+
+    @staticmethod
+    def pack(depth, bound, move):
+        return (depth & 0xFF) | (bound << 8) | (move << 16)
+
+    def probe(self, key):
+        """
+        :param key: 64 bit position key
+        :return: (depth, bound, value, move) or None if the key is not in the table
+        """
+        check, data, value = self.SLOT.unpack_from(self.buffer, (key % self.slots) * self.SLOT.size)
+        value_bits = struct.unpack('<Q', struct.pack('<d', value))[0]
+        if check ^ data ^ value_bits != key:
+            return None
+        return data & 0xFF, (data >> 8) & 0xFF, value, (data >> 16) & 0xFFFF
+
+    def store(self, key, depth, bound, value, move=NO_MOVE):
+        """
+        Stores a search result, unless the slot holds a deeper result for the same key.
+        :param key: 64 bit position key
+        :param depth: remaining depth the value was searched to (0-255)
+        :param bound: EXACT, LOWER or UPPER, possibly or-ed with WIN
+        :param value:
+        :param move: best move as a cell index, or NO_MOVE
+        :return:
+        """
+        offset = (key % self.slots) * self.SLOT.size
+        entry = self.probe(key)
+        if entry is not None and entry[0] > depth:
+            return
+        data = self.pack(depth, bound, move)
+        value_bits = struct.unpack('<Q', struct.pack('<d', value))[0]
+        self.SLOT.pack_into(self.buffer, offset, key ^ data ^ value_bits, data, value)
+
+    def clear(self):
+        self.buffer[:] = bytes(self.slots * self.SLOT.size)
+
+    def dump(self):
+        """
+        :return: a copy of the table contents (e.g. for checkpoints)
+        """
+        return bytes(self.buffer)
+
+    def load(self, contents):
+        self.buffer[:len(contents)] = contents
+
+    def close(self):
+        """
+        Detaches from the block; the process that created it also frees it.
+        :return:
+        """
+        self.buffer.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+def expected_entry(key):
+    """
+    Entry that the concurrent writers store for key, so that any hit can be verified
+    """
+    return key % 200, key % 3, float(key % 1000003), key % 0xFFFF
+
+
+def write_keys(table, seed, count, errors):
+    rng = random.Random(seed)
+    for _ in range(count):
+        key = rng.getrandbits(64)
+        table.store(key, *expected_entry(key))
+        probe_key = rng.getrandbits(64) if rng.random() < 0.5 else key
+        entry = table.probe(probe_key)
+        if entry is not None and entry != expected_entry(probe_key):
+            with errors.get_lock():
+                errors.value += 1
+
+
+def check_concurrent_writers(processes=4, writes=50000, slots=1024):
+    """
+    Several processes store and probe random keys in a small shared table at the same time,
+    so that they constantly overwrite each other's slots.
+    Every hit, during the run and when scanning the table afterwards, must match what was stored for its key.
+    :return: (number of inconsistent hits, number of valid entries found after the run)
+    """
+    table = SharedTranspositionTable(slots)
+    errors = multiprocessing.Value('i', 0)
+    workers = [multiprocessing.Process(target=write_keys, args=(table, seed, writes, errors))
+               for seed in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    valid = 0
+    inconsistent = errors.value
+    for slot in range(slots):
+        check, data, value = table.SLOT.unpack_from(table.buffer, slot * table.SLOT.size)
+        value_bits = struct.unpack('<Q', struct.pack('<d', value))[0]
+        key = check ^ data ^ value_bits
+        if key % slots != slot or data == 0 and value == 0:
+            continue
+        valid += 1
+        if table.probe(key) != expected_entry(key):
+            inconsistent += 1
+    table.close()
+    return inconsistent, valid
+
+
+def benchmark(slots=1 << 20, operations=200000):
+    """
+    :return: (stores per second, probes per second) in a single process
+    """
+    table = SharedTranspositionTable(slots)
+    rng = random.Random(0)
+    keys = [rng.getrandbits(64) for _ in range(operations)]
+
+    start = time.perf_counter()
+    for key in keys:
+        table.store(key, 4, SharedTranspositionTable.EXACT, 1.5, 7)
+    store_rate = operations / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for key in keys:
+        table.probe(key)
+    probe_rate = operations / (time.perf_counter() - start)
+
+    table.close()
+    return store_rate, probe_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark and check the shared transposition table.')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--operations', type=int, default=200000)
+    args = parser.parse_args()
+
+    store_rate, probe_rate = benchmark(operations=args.operations)
+    print(F'stores/s: {store_rate:.0f}  probes/s: {probe_rate:.0f}')
+    inconsistent, valid = check_concurrent_writers(args.processes)
+    print(F'concurrent writers: {valid} valid entries, {inconsistent} inconsistent')
+    if inconsistent:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,14 @@
 # coding: utf-8
 
 import json
-from ScoreBoard import ScoreBoard
+from SweepRunner import SweepRunner
 
 
 def main():
     config_file = open('./configurations.json')
     configs = json.load(config_file)
-    sboard = ScoreBoard(5)
-    for i, config in enumerate(configs):
-        sboard.calculateScore(config)
-        sboard.printAverageEndOfAllGames(i)
+    runner = SweepRunner(5, store='results')
+    runner.run(configs)
 
 
 if __name__ == "__main__":
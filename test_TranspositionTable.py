@@ -0,0 +1,22 @@
+from TranspositionTable import SharedTranspositionTable, check_concurrent_writers
+
+
+def test_store_and_probe():
+    table = SharedTranspositionTable(1024)
+    try:
+        assert table.probe(12345) is None
+        table.store(12345, 3, SharedTranspositionTable.LOWER, -2.5, 17)
+        assert table.probe(12345) == (3, SharedTranspositionTable.LOWER, -2.5, 17)
+        # a shallower result never replaces a deeper one
+        table.store(12345, 2, SharedTranspositionTable.EXACT, 1.0, 4)
+        assert table.probe(12345) == (3, SharedTranspositionTable.LOWER, -2.5, 17)
+        # a key mapping to the same slot misses
+        assert table.probe(12345 + 1024) is None
+    finally:
+        table.close()
+
+
+def test_concurrent_writers():
+    inconsistent, valid = check_concurrent_writers(processes=4, writes=20000)
+    assert inconsistent == 0
+    assert valid > 0